@@ -20,6 +20,10 @@ from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.output_parsers import StrOutputParser
 
 import random
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import json
 
@@ -28,17 +32,24 @@ from langgraph.graph import END, StateGraph, START
 from typing import Literal
 
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_groq import ChatGroq
+from langchain_core.runnables import RunnableLambda
+from agentapp.llmGateway import get_chat_model
 
 from pydantic import BaseModel, Field
 
 from langchain_core.documents import Document
 
+from agentapp.semanticCache import SemanticAnswerCache
+from agentapp.embeddingCache import get_embedding_model
+from agentapp.metrics import instrument_node, instrument_graph, current_request_usage
+from agentapp.resourceRegistry import resource_registry
+from agentapp.hybridRetriever import HybridRetriever
+from agentapp.localRouter import CentroidRouter
+
 
 # Load environment variables from the .env file in the same directory as this script
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 
-from langchain_groq import ChatGroq
 
 # print(f"GROQ_API_KEY: {os.getenv('GROQ_API_KEY')}")
 
@@ -48,7 +59,7 @@ if groq_api_key:
 else:
     raise ValueError("GROQ_API_KEY environment variable is not set")
 
-llm = ChatGroq(model="openai/gpt-oss-120b", temperature=0)
+llm = get_chat_model("openai/gpt-oss-120b", temperature=0)
 
 # Schema for structured output to use as routing logic
 class Route(BaseModel):
@@ -93,11 +104,17 @@ class GraphState(TypedDict):
     issueProblemDesc: Optional[str]
     policyNumber: Optional[str]
     validIssue: bool
+    rewriteCount: int
+    rewriteMemo: dict
+    attemptedQueries: List[str]
+    generationGrade: str
+    bestGeneration: Optional[str]
+    bestGenerationRank: int
+    bestEffort: Optional[str]
 
 
-# Router node
-def supervisor(state):
-    """Route the question to the appropriate node"""
+def llm_supervisor_route(question):
+    """Ask the LLM router for the supervisor decision"""
     prompt = f"""
                 Route the input to rag_search,issue_analyser based on the user's request.
                 if the input is an problem statement then set decision as issue_analyser and type as issue.
@@ -107,11 +124,18 @@ def supervisor(state):
             SystemMessage(
                 content=prompt
             ),
-            HumanMessage(content=state["question"])
+            HumanMessage(content=question)
         ]
     )
     print(f"descision >>>>>>>>>>>. : {descision}")
-    return {"decision": descision.step, "type": descision.type}
+    return descision.step
+
+
+# Router node
+def supervisor(state):
+    """Route the question to the appropriate node, locally when the local router is confident"""
+    step = local_router.route("supervisor", state["question"], llm_supervisor_route)
+    return {"decision": step, "type": "issue" if step == "issue_analyser" else "query"}
 
 
 # Issue analyser node
@@ -155,24 +179,91 @@ def route_decision(state):
 
 persist_directory = os.path.join(os.path.dirname(os.path.dirname(__file__)), "sample_db")
 
-# Initialize OpenAI embeddings
-embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+# Initialize embeddings, shared and cached so repeated questions are embedded only once.
+# The weights and the Chroma clients load lazily through the resource registry.
+embedding_model = get_embedding_model("sentence-transformers/all-MiniLM-L6-v2")
+# CachedEmbeddings also loads the model itself on the first cache miss, the probe reports that load
+resource_registry.register("embeddings", embedding_model.load, loaded=embedding_model.is_loaded)
 
-# Initialize Chroma vectorstore with persistent directory
-vectorstore = Chroma(
+# Chroma vectorstore with persistent directory
+resource_registry.register("faq_vectorstore", lambda: Chroma(
     collection_name="life_queries",
     embedding_function=embedding_model,
     persist_directory=persist_directory
-)
+))
 
-# Initialize Chroma vectorstore with persistent directory
-issue_sop_vectorstore = Chroma(
+# Chroma vectorstore with persistent directory
+resource_registry.register("issue_sop_vectorstore", lambda: Chroma(
     collection_name="life_issue_sop",
     embedding_function=embedding_model,
     persist_directory=persist_directory
+))
+
+# Retrieval per collection: vector search fused with BM25 keyword search.
+# k is the number of documents handed to the grader, fetch_k the candidates taken from each ranking.
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "true").lower() == "true"
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+
+resource_registry.register("faq_retriever", lambda: HybridRetriever(
+    resource_registry.get("faq_vectorstore"),
+    collection_name="life_queries",
+    category="life-query",
+    persist_directory=persist_directory,
+    k=int(os.getenv("FAQ_RETRIEVAL_K", "3")),
+    fetch_k=int(os.getenv("FAQ_RETRIEVAL_FETCH_K", "10")),
+    rrf_k=HYBRID_RRF_K,
+    hybrid=HYBRID_RETRIEVAL
+).warm_up())
+
+resource_registry.register("issue_sop_retriever", lambda: HybridRetriever(
+    resource_registry.get("issue_sop_vectorstore"),
+    collection_name="life_issue_sop",
+    category="life_issue_sop",
+    persist_directory=persist_directory,
+    k=int(os.getenv("ISSUE_SOP_RETRIEVAL_K", "3")),
+    fetch_k=int(os.getenv("ISSUE_SOP_RETRIEVAL_FETCH_K", "10")),
+    rrf_k=HYBRID_RRF_K,
+    hybrid=HYBRID_RETRIEVAL
+).warm_up())
+
+# Local nearest-centroid router for supervisor and rag_route, the LLM routers are the fallback
+local_router = CentroidRouter(embedding_model)
+resource_registry.register("local_router", local_router.warm_up)
+
+# Semantic cache of graded final answers, keyed on the question embedding
+answer_cache = SemanticAnswerCache(
+    embedding_model,
+    persist_directory,
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+    ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600")),
+    max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1024"))
 )
 
 
+def lookup_cached_answer(question):
+    """
+    Return a cached final graph response for a paraphrase of the question, or None.
+    """
+    return answer_cache.lookup(question)
+
+
+def cache_answer(question, response):
+    """
+    Cache a final graph response if it carries a generation that passed the graders.
+    Web search answers are not cached since they are not backed by a collection, nor are
+    best-effort answers of requests that ran out of loop budget.
+    """
+    if not response.get("generation") or response.get("vectorDecision") == "web_search" or response.get("bestEffort"):
+        return
+
+    # Same collection selection as retrieve
+    collection_name = "life_queries"
+    if response.get("type") == "issue" and response.get("validIssue") == True:
+        collection_name = "life_issue_sop"
+
+    answer_cache.store(question, response, collection_name)
+
+
 # Data model
 class RouteQuery(BaseModel):
     """Route a user query to modest relevant datasource."""
@@ -183,7 +274,7 @@ class RouteQuery(BaseModel):
     )
 
 # LLM with function call
-llm = ChatGroq(model="openai/gpt-oss-120b", temperature=0)
+llm = get_chat_model("openai/gpt-oss-120b", temperature=0)
 structured_llm_router = llm.with_structured_output(RouteQuery)
 
 # Prompt
@@ -214,7 +305,7 @@ class GradeDocuments(BaseModel):
 
 
 ## LLM with function call
-grader_llm = ChatGroq(model="llama-3.3-70B-versatile", temperature=0)
+grader_llm = get_chat_model("llama-3.3-70B-versatile", temperature=0)
 structured_llm_grader = grader_llm.with_structured_output(GradeDocuments)
 
 # Prompt
@@ -233,6 +324,55 @@ grade_prompt = ChatPromptTemplate.from_messages(
 
 retrieval_grader = grade_prompt | structured_llm_grader
 
+# Cap on in-flight grader calls across all requests, keeps us under the Groq rate limits
+GRADER_MAX_CONCURRENCY = int(os.getenv("GRADER_MAX_CONCURRENCY", "3"))
+grader_semaphore = threading.BoundedSemaphore(GRADER_MAX_CONCURRENCY)
+
+def bounded_retrieval_grade(inputs):
+    """Grade a single document while holding a grader slot"""
+    with grader_semaphore:
+        return retrieval_grader.invoke(inputs)
+
+bounded_retrieval_grader = RunnableLambda(bounded_retrieval_grade)
+
+
+## Retrieval loop budget
+
+# Per request limits of the transform_query -> retrieve -> grade -> generate loop. Once one
+# is reached the best grounded generation so far is returned instead of looping on.
+RAG_MAX_REWRITES = int(os.getenv("RAG_MAX_REWRITES", "3"))
+RAG_MAX_LLM_CALLS = int(os.getenv("RAG_MAX_LLM_CALLS", "25"))
+RAG_DEADLINE_SECONDS = float(os.getenv("RAG_DEADLINE_SECONDS", "60"))
+
+# How close a generation came to passing the graders, higher is better
+GENERATION_GRADE_RANK = {"notSupported": 0, "notUseful": 1, "useful": 2}
+# Only grounded generations may be returned as best effort, ungrounded runs end in NO_ANSWER
+MIN_BEST_EFFORT_RANK = GENERATION_GRADE_RANK["notUseful"]
+
+NO_ANSWER = "I don't have enough information to answer this question."
+
+
+def normalize_query(query):
+    return " ".join(str(query or "").lower().split())
+
+
+def exhausted_budget(state):
+    """
+    The reason the retrieval loop budget of the request is used up, or None.
+    """
+    if state.get("bestEffort"):
+        return state["bestEffort"]
+    if state.get("rewriteCount", 0) >= RAG_MAX_REWRITES:
+        return "max_rewrites"
+
+    usage = current_request_usage()
+    if usage is not None:
+        if usage["llm_calls"] >= RAG_MAX_LLM_CALLS:
+            return "max_llm_calls"
+        if time.monotonic() - usage["started"] >= RAG_DEADLINE_SECONDS:
+            return "deadline"
+    return None
+
 
 ## Generate
 
@@ -247,14 +387,17 @@ prompt = ChatPromptTemplate.from_messages(
 )
 
 # LLM
-llm = ChatGroq(model="openai/gpt-oss-120b", temperature=0)
+llm = get_chat_model("openai/gpt-oss-120b", temperature=0)
 
 # Post-processing
 # def format_docs(doc_txt):
 #     return "\n\n".join(doc.page_content for doc in docs)
 
+# Tag used by the streaming endpoint to pick the answer tokens out of all LLM calls
+GENERATION_TAG = "rag_generation"
+
 # Chain
-rag_chain = prompt | llm | StrOutputParser()
+rag_chain = (prompt | llm | StrOutputParser()).with_config(tags=[GENERATION_TAG])
 
 
 
@@ -269,7 +412,7 @@ class GradeHallucination(BaseModel):
     )
 
 # LLM with function call
-llm = ChatGroq(model="llama-3.3-70B-versatile", temperature=0)
+llm = get_chat_model("llama-3.3-70B-versatile", temperature=0)
 structured_llm_grader = llm.with_structured_output(GradeHallucination)
 
 # Prompt
@@ -316,7 +459,7 @@ class GradeAnswer(BaseModel):
     )
 
 # LLM with function call
-answer_prompt_llm = ChatGroq(model="openai/gpt-oss-120b", temperature=0)
+answer_prompt_llm = get_chat_model("openai/gpt-oss-120b", temperature=0)
 structured_llm_grader = answer_prompt_llm.with_structured_output(GradeAnswer)
 
 # Prompt
@@ -361,10 +504,71 @@ answer_prompt = ChatPromptTemplate.from_messages(
 
 answer_grader = answer_prompt | structured_llm_grader
 
+## Combined Generation Grader
+
+# Data model
+class GradeGeneration(BaseModel):
+    """Binary scores for grounding and usefulness of a generation in one call."""
+
+    grounded: Literal["yes", "no"] = Field(
+        description="Answer is grounded in the facts, 'yes' or 'no'"
+    )
+    addresses_question: Literal["yes", "no"] = Field(
+        description="Answer addresses the question, 'yes' or 'no'"
+    )
+
+# LLM with function call
+combined_grader_llm = get_chat_model("openai/gpt-oss-120b", temperature=0)
+structured_llm_grader = combined_grader_llm.with_structured_output(GradeGeneration)
+
+# Prompt
+system = """You are a validator for a retrieval-augmented generation system that supports
+predefined issues with SOP-based solutions (insurance payment status, updating policy holder
+details, accident-related vehicle damage estimation) and LIC FAQs.
+
+Give two binary scores, 'yes' or 'no'.
+
+grounded:
+- 'yes' if the response aligns with the intent, workflow or purpose of the retrieved facts,
+  applies or explains the SOP steps (inferred details and logical continuation are allowed)
+  and stays within the same domain.
+- 'no' ONLY if the response fabricates APIs, policies or steps, contradicts the retrieved
+  workflow or discusses a different problem or domain.
+
+addresses_question:
+- 'yes' if the response addresses the same problem domain as the user's question and its
+  steps or information would help progress or resolve the issue. Procedural answers, SOP
+  steps or API calls are valid final answers, they do not need to fully resolve the issue.
+- 'no' only if it belongs to a completely different issue or provides no useful information.
+"""
+
+combined_grade_prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system),
+        ("human", "Set of facts: \n\n {documents} \n\n User question: \n\n {question} \n\n LLM generation: {generation} \n")
+    ]
+)
+
+combined_generation_grader = combined_grade_prompt | structured_llm_grader
+
+# How the generation is graded after generate:
+#   sequential - hallucination grader, then the answer grader only if grounded (two serial calls)
+#   concurrent - both graders at once, the first 'no' decides without waiting for the other
+#   combined   - one structured call returning both verdicts
+GENERATION_GRADING_MODE = os.getenv("GENERATION_GRADING_MODE", "sequential").lower()
+if GENERATION_GRADING_MODE not in ("sequential", "concurrent", "combined"):
+    raise ValueError(f"Unknown GENERATION_GRADING_MODE: {GENERATION_GRADING_MODE}")
+
+# Threads running the concurrent graders, two per graded generation
+generation_grader_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("GENERATION_GRADER_WORKERS", "8")),
+    thread_name_prefix="generation-grader"
+)
+
 ## Question Re-writer
 
 # LLM
-question_rewriter_llm = ChatGroq(model="openai/gpt-oss-120b", temperature=0)
+question_rewriter_llm = get_chat_model("openai/gpt-oss-120b", temperature=0)
 
 # prompt
 system = """You are a question re-writer that converts an input question to a better version optimized for vectorstore retrieval.
@@ -406,21 +610,16 @@ def retrieve(state):
     question = state["question"]
 
     # default vector store
-    store = vectorstore
-    filter = {"category": "life-query"}
+    retriever = resource_registry.get("faq_retriever")
 
-    # issue sop vector store
+    # issue sop vector store, searched with the problem description until it gets rewritten
     if state["type"] == "issue" and state["validIssue"] == True:
-        store = issue_sop_vectorstore
-        filter = {"category": "life_issue_sop"}
-        question = state["issueProblemDesc"]
-
-    ## context
-    documents = store.similarity_search(
-            question,
-            k=3,
-            filter=filter
-        )
+        retriever = resource_registry.get("issue_sop_retriever")
+        if not state.get("rewriteCount"):
+            question = state["issueProblemDesc"]
+
+    ## context, vector and keyword results fused
+    documents = retriever.invoke(question)
 
     print(f"docs: {documents}")
 
@@ -466,17 +665,15 @@ def grade_documents(state):
     print(f"question: {question}")
     print(f"documents: {documents}")
 
-    # Score each doc
-    filtered_docs = []
+    # Score all docs concurrently, batch keeps the original document order
+    scores = bounded_retrieval_grader.batch(
+        [{"question": question, "document": doc.page_content} for doc in documents],
+        config={"max_concurrency": GRADER_MAX_CONCURRENCY}
+    )
 
-    for doc in documents:
-        score = retrieval_grader.invoke(
-            {
-                "question": question,
-                "document": doc.page_content
-            }
-        )
+    filtered_docs = []
 
+    for doc, score in zip(documents, scores):
         print(f"grade_documents score: {score}")
 
         grade = score.binary_score
@@ -507,15 +704,37 @@ def transform_query(state):
 
     question = state["question"]
     documents = state["documents"]
+    rewrite_memo = dict(state.get("rewriteMemo") or {})
+    attempted = list(state.get("attemptedQueries") or [])
 
-    # We assume that this is a function
-    better_question = question_rewriter.invoke(
-        {
-            "question": question
-        }
-    )
+    if normalize_query(question) not in attempted:
+        attempted.append(normalize_query(question))
+
+    # The rewriter is deterministic, a question is never sent to it twice
+    better_question = rewrite_memo.get(normalize_query(question))
+    if better_question is None:
+        better_question = question_rewriter.invoke(
+            {
+                "question": question
+            }
+        )
+        rewrite_memo[normalize_query(question)] = better_question
+
+    update = {
+        "documents": documents,
+        "question": better_question,
+        "rewriteCount": state.get("rewriteCount", 0) + 1,
+        "rewriteMemo": rewrite_memo,
+        "attemptedQueries": attempted
+    }
+
+    # Retrying a query that was already tried cannot find anything new,
+    # route_rewrite ends the request in best_effort instead of retrieving again
+    if normalize_query(better_question) in attempted:
+        print("---REWRITE ALREADY ATTEMPTED, STOP RETRYING---")
+        update["bestEffort"] = "repeated_rewrite"
 
-    return {"documents": documents, "question": better_question}
+    return update
 
 def web_search(state):
     """
@@ -557,6 +776,12 @@ def ragDecision(state):
 
     question = state["question"]
 
+    datasource = local_router.route("rag_route", question, llm_rag_route)
+
+    return {"vectorDecision": datasource, "question": question}
+
+def llm_rag_route(question):
+    """Ask the LLM router for the datasource"""
     source = question_router.invoke(
         {
             "question": question
@@ -565,7 +790,7 @@ def ragDecision(state):
 
     print(f"source : >>>>>>> ", source)
 
-    return {"vectorDecision": source.datasource, "question": question}
+    return source.datasource
 
 
 ## Edges ##
@@ -613,7 +838,11 @@ def decide_to_generate(state):
     if not filtered_documents:
 
         # All documents have filtered check_relevance
-        # We will re-generate a new query
+        # We will re-generate a new query, unless the loop budget is used up
+        if exhausted_budget(state):
+            print("---DECISION: ALL DOCUMENTS ARE NOT RELEVANT, LOOP BUDGET EXHAUSTED---")
+            return "best_effort"
+
         print("---DECISION: ALL DOCUMENTS ARE NOT RELEVANT TO QUESTION, TRANSFORM QUERY---")
         
         return "transform_query"
@@ -646,6 +875,11 @@ def grade_generation_v_documents_and_answers(state):
     print(f"documents: {documents}")
     print(f"generation: {generation}")
 
+    if GENERATION_GRADING_MODE == "concurrent":
+        return grade_generation_concurrently(question, documents, generation)
+    if GENERATION_GRADING_MODE == "combined":
+        return grade_generation_combined(question, documents, generation)
+
     score = hallucincation_grader.invoke(
         {
             "documents": documents,
@@ -685,6 +919,143 @@ def grade_generation_v_documents_and_answers(state):
         print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY---")
         return "notSupported"
     
+def grade_generation_concurrently(question, documents, generation):
+    """
+    Run the hallucination and answer graders at once. Grounding decides: a 'no' from
+    the hallucination grader returns notSupported right away and the answer grade is
+    cancelled or ignored. An answer 'no' still waits for grounding, notUseful is only
+    returned for grounded generations.
+
+    Returns:
+        str: Decision for next node to call
+    """
+
+    # Each grader runs in a copy of the node context so the callbacks (metrics, tracing) follow it
+    hallucination_future = generation_grader_pool.submit(
+        contextvars.copy_context().run, hallucincation_grader.invoke, {"documents": documents, "generation": generation}
+    )
+    answer_future = generation_grader_pool.submit(
+        contextvars.copy_context().run, answer_grader.invoke, {"question": question, "generation": generation}
+    )
+
+    # Both run at once, but the grounding grade is always read first
+    if hallucination_future.result().binary_score != "yes":
+        # Not started yet: skip it, already running: its grade is ignored
+        answer_future.cancel()
+        print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY---")
+        return "notSupported"
+
+    if answer_future.result().binary_score != "yes":
+        print("---DECISION: GENERATION DOES NOT ADDRESS QUESTION---")
+        return "notUseful"
+
+    print("---DECISION: GENERATION IS GROUNDED AND ADDRESSES QUESTION---")
+    return "useful"
+
+
+def grade_generation_combined(question, documents, generation):
+    """
+    Grade grounding and usefulness of the generation with a single structured call.
+
+    Returns:
+        str: Decision for next node to call
+    """
+
+    score = combined_generation_grader.invoke(
+        {
+            "documents": documents,
+            "question": question,
+            "generation": generation
+        }
+    )
+
+    print(f"generation score: {score}")
+
+    if score.grounded != "yes":
+        print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY---")
+        return "notSupported"
+    if score.addresses_question != "yes":
+        print("---DECISION: GENERATION DOES NOT ADDRESS QUESTION---")
+        return "notUseful"
+
+    print("---DECISION: GENERATION IS GROUNDED AND ADDRESSES QUESTION---")
+    return "useful"
+
+def grade_generation(state):
+    """
+    Grade the generation and keep the best grounded generation of the request.
+
+    Args:
+        state (dict): The current graph state
+
+    Returns:
+        state (dict): Updates generationGrade, and bestGeneration when this one is grounded and ranks higher
+    """
+
+    grade = grade_generation_v_documents_and_answers(state)
+    update = {"generationGrade": grade}
+
+    rank = GENERATION_GRADE_RANK[grade]
+    if rank >= MIN_BEST_EFFORT_RANK and rank > state.get("bestGenerationRank", -1):
+        update["bestGeneration"] = state["generation"]
+        update["bestGenerationRank"] = rank
+
+    return update
+
+def route_generation(state):
+    """
+    Finish on a useful generation, otherwise retry through transform_query while the loop budget lasts.
+
+    Args:
+        state (dict): The current graph state
+
+    Returns:
+        str: Next node to call
+    """
+
+    grade = state["generationGrade"]
+    if grade == "useful":
+        return "useful"
+
+    if exhausted_budget(state):
+        print("---DECISION: LOOP BUDGET EXHAUSTED, RETURN BEST EFFORT---")
+        return "best_effort"
+    return grade
+
+def route_rewrite(state):
+    """
+    Retrieve with the rewritten question, unless transform_query found it was already tried.
+
+    Args:
+        state (dict): The current graph state
+
+    Returns:
+        str: Next node to call
+    """
+
+    if state.get("bestEffort"):
+        print("---DECISION: REPEATED REWRITE, RETURN BEST EFFORT---")
+        return "best_effort"
+    return "retrieve"
+
+def best_effort(state):
+    """
+    Finish a request whose loop budget is used up with the best grounded generation so far,
+    NO_ANSWER when no generation passed the hallucination grader.
+
+    Args:
+        state (dict): The current graph state
+
+    Returns:
+        state (dict): Updates generation and records the exhausted budget in bestEffort
+    """
+
+    reason = exhausted_budget(state) or "budget_exhausted"
+    usage = current_request_usage() or {}
+    print(f"---BEST EFFORT ({reason}): {state.get('rewriteCount', 0)} rewrites, {usage.get('llm_calls')} LLM calls---")
+
+    return {"generation": state.get("bestGeneration") or NO_ANSWER, "bestEffort": reason}
+
 def taskcreation_condition(state):
     """
     Route to task_creator node, task_creator node will create the task for us 
@@ -710,15 +1081,17 @@ def build_graph():
 
     workflow = StateGraph(GraphState)
 
-    # Define the nodes
-    workflow.add_node("supervisor", supervisor) # Decision maker node(root router)
-    workflow.add_node("rag_route", ragDecision)  # route question
-    workflow.add_node("web_search", web_search)  # web search
-    workflow.add_node("issue_analyser", issue_analyser) # issue analyser
-    workflow.add_node("retrieve", retrieve)  # retrieve
-    workflow.add_node("grade_documents", grade_documents)  # grade documents
-    workflow.add_node("generate", generate)  # generate
-    workflow.add_node("transform_query", transform_query) # transform_query
+    # Define the nodes, every node is timed and counted by the metrics subsystem
+    workflow.add_node("supervisor", instrument_node("customer", "supervisor", supervisor)) # Decision maker node(root router)
+    workflow.add_node("rag_route", instrument_node("customer", "rag_route", ragDecision))  # route question
+    workflow.add_node("web_search", instrument_node("customer", "web_search", web_search))  # web search
+    workflow.add_node("issue_analyser", instrument_node("customer", "issue_analyser", issue_analyser)) # issue analyser
+    workflow.add_node("retrieve", instrument_node("customer", "retrieve", retrieve))  # retrieve
+    workflow.add_node("grade_documents", instrument_node("customer", "grade_documents", grade_documents))  # grade documents
+    workflow.add_node("generate", instrument_node("customer", "generate", generate))  # generate
+    workflow.add_node("transform_query", instrument_node("customer", "transform_query", transform_query, counts_loop=True)) # transform_query
+    workflow.add_node("grade_generation", instrument_node("customer", "grade_generation", grade_generation)) # grade generation
+    workflow.add_node("best_effort", instrument_node("customer", "best_effort", best_effort)) # loop budget exhausted
 
     # Chat Assistant
     workflow.add_edge(START, "supervisor")
@@ -759,23 +1132,36 @@ def build_graph():
         decide_to_generate,
         {
             "transform_query": "transform_query",
-            "generate": "generate"
+            "generate": "generate",
+            "best_effort": "best_effort"
+        }
+    )
+
+    workflow.add_conditional_edges(
+        "transform_query",
+        route_rewrite,
+        {
+            "retrieve": "retrieve",
+            "best_effort": "best_effort"
         }
     )
 
-    workflow.add_edge("transform_query", "retrieve")
+    workflow.add_edge("generate", "grade_generation")
 
     workflow.add_conditional_edges(
-        "generate",
-        grade_generation_v_documents_and_answers,
+        "grade_generation",
+        route_generation,
         {
             "useful": END,
             "notUseful": "transform_query",
-            "notSupported": "transform_query"
+            "notSupported": "transform_query",
+            "best_effort": "best_effort"
         }
     )
 
+    workflow.add_edge("best_effort", END)
+
     # Compile
-    graph = workflow.compile()
+    graph = instrument_graph(workflow.compile(), "customer")
 
     return graph
\ No newline at end of file
@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface import HuggingFaceEmbeddings
+
+DEFAULT_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+# Optional sqlite file shared by the API and the ingestion scripts, disabled when empty.
+# Relative paths are resolved against the fastapi-backend dir since both run from different dirs.
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")
+if EMBEDDING_CACHE_PATH:
+    EMBEDDING_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), EMBEDDING_CACHE_PATH)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper with an in-memory LRU and an optional on-disk sqlite store.
+
+    Vectors are keyed by model name, kind (query/document) and the text hash,
+    so only texts never seen before reach the underlying model. The underlying
+    model is created by underlying_factory on the first cache miss (or load()).
+    """
+
+    def __init__(self, underlying_factory, model_name: str, cache_size: int = EMBEDDING_CACHE_SIZE,
+                 cache_path: str = EMBEDDING_CACHE_PATH):
+        self.underlying_factory = underlying_factory
+        self.model_name = model_name
+        self.cache_size = cache_size
+
+        self._underlying = None
+        self._load_lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._db = None
+        if cache_path:
+            self._db = sqlite3.connect(cache_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+            self._db.commit()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def load(self) -> Embeddings:
+        """Create the underlying model if needed and return it."""
+        if self._underlying is None:
+            with self._load_lock:
+                if self._underlying is None:
+                    self._underlying = self.underlying_factory()
+        return self._underlying
+
+    def is_loaded(self) -> bool:
+        return self._underlying is not None
+
+    def _key(self, kind: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{kind}:{digest}"
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.cache_size:
+            self._memory.popitem(last=False)
+
+    def _get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    vector = array("f")
+                    vector.frombytes(row[0])
+                    vector = vector.tolist()
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def _put_many(self, items):
+        with self._lock:
+            for key, vector in items:
+                self._remember(key, vector)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, array("f", vector).tobytes()) for key, vector in items]
+                )
+                self._db.commit()
+
+    def embed_query(self, text: str) -> list:
+        key = self._key("query", text)
+        vector = self._get(key)
+        if vector is None:
+            vector = list(self.load().embed_query(text))
+            self._put_many([(key, vector)])
+        return list(vector)
+
+    def embed_documents(self, texts: list) -> list:
+        keys = [self._key("document", text) for text in texts]
+        vectors = [self._get(key) for key in keys]
+
+        # Embed all misses in one call, duplicates only once
+        missing = OrderedDict()
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None:
+                missing.setdefault(key, text)
+
+        if missing:
+            embedded = self.load().embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), [list(v) for v in embedded]))
+            self._put_many(list(computed.items()))
+            vectors = [vector if vector is not None else computed[key] for key, vector in zip(keys, vectors)]
+
+        return [list(vector) for vector in vectors]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "model_name": self.model_name,
+                "entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_embedding_model(model_name: str = DEFAULT_MODEL_NAME) -> CachedEmbeddings:
+    """Return the process wide cached embedding model for model_name, the weights load on first use."""
+    with _models_lock:
+        if model_name not in _models:
+            _models[model_name] = CachedEmbeddings(lambda: HuggingFaceEmbeddings(model_name=model_name), model_name)
+        return _models[model_name]
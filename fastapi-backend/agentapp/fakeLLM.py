@@ -0,0 +1,168 @@
+import re
+import time
+import uuid
+import threading
+import typing
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from agentapp.messageHistory import COMPACTED_TOOL_CALLS_KEY
+
+
+class FakeLLMStats:
+    """Call count and time spent inside fake LLM calls, shared by all instances."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.seconds = 0.0
+
+    def record(self, seconds):
+        with self.lock:
+            self.calls += 1
+            self.seconds += seconds
+
+
+fake_llm_stats = FakeLLMStats()
+
+# Tools the fake assistant calls in order, one per step, before finishing
+DEFAULT_TOOL_PLAN = ["get_payment_status", "check_bank_statement", "create_support_ticket"]
+
+
+def message_text(messages) -> str:
+    return "\n".join(str(getattr(m, "content", m)) for m in messages)
+
+
+def fake_structured_response(schema, text: str):
+    """
+    Deterministic instance of a structured output schema of the graphs, derived
+    from the prompt text. Unknown schemas get the first allowed value per field.
+    """
+    name = schema.__name__
+    policy = re.search(r"polic(?:y|ies)(?: number)?\D{0,5}(\d{4,})", text, re.IGNORECASE)
+
+    if name == "Route":
+        is_issue = policy is not None
+        return schema(step="issue_analyser" if is_issue else "rag_search", type="issue" if is_issue else "query")
+    if name == "IssueState":
+        question = text.strip().splitlines()[-1]
+        return schema(
+            validIssue=policy is not None,
+            missingProperties=[] if policy else ["policyNumber"],
+            issueProblemDesc=question,
+            policyNumber=policy.group(1) if policy else None
+        )
+    if name == "RouteQuery":
+        return schema(datasource="vectorstore")
+
+    values = {}
+    for field_name, field in schema.model_fields.items():
+        annotation = field.annotation
+        if typing.get_origin(annotation) is typing.Literal:
+            values[field_name] = "yes" if "yes" in typing.get_args(annotation) else typing.get_args(annotation)[0]
+        elif annotation is bool:
+            values[field_name] = True
+        elif typing.get_origin(annotation) in (list, List):
+            values[field_name] = []
+        elif not field.is_required():
+            values[field_name] = field.get_default()
+        else:
+            values[field_name] = ""
+    return schema(**values)
+
+
+class FakeChatGroq(BaseChatModel):
+    """
+    Drop-in offline replacement for ChatGroq with a configurable fixed latency,
+    served by the LLM gateway when LLM_BACKEND=fake.
+
+    Plain calls answer with a short deterministic text, with_structured_output
+    returns schema instances (see fake_structured_response) and tool-bound calls
+    walk through tool_plan one tool per step.
+    """
+
+    model: str = "fake"
+    temperature: float = 0
+    latency: float = 0.0
+    tool_plan: List[str] = DEFAULT_TOOL_PLAN
+    bound_tools: Optional[List[dict]] = None
+
+    # Latency applied to instances created without an explicit latency
+    default_latency: typing.ClassVar[float] = 0.0
+
+    def __init__(self, **kwargs: Any):
+        kwargs.setdefault("latency", FakeChatGroq.default_latency)
+        super().__init__(**kwargs)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-groq"
+
+    def _sleep(self):
+        started = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        fake_llm_stats.record(time.perf_counter() - started)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self._sleep()
+        if self.bound_tools is not None:
+            message = self._next_tool_message(messages)
+        else:
+            question = re.search(r"Question: (.*)", message_text(messages))
+            message = AIMessage(content=f"Answer for: {question.group(1) if question else 'the question'}")
+        # Rough usage, about four characters per token like the gateway estimate
+        prompt_tokens = len(message_text(messages)) // 4
+        completion_tokens = len(str(message.content)) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output={"token_usage": usage, "model_name": self.model})
+
+    def _next_tool_message(self, messages) -> AIMessage:
+        # Steps already run: tool calls in the history plus those replaced by a compaction note
+        done = sum(
+            len(getattr(m, "tool_calls", None) or []) + len(getattr(m, "additional_kwargs", {}).get(COMPACTED_TOOL_CALLS_KEY, []))
+            for m in messages
+        )
+        available = {tool["function"]["name"]: tool["function"] for tool in self.bound_tools}
+        plan = [name for name in self.tool_plan if name in available]
+        if done >= len(plan):
+            return AIMessage(content="All SOP steps completed.")
+
+        text = message_text(messages)
+        user_id = re.search(r"userID: (\S+)", text)
+        user_id = user_id.group(1) if user_id else "U001"
+        image_url = re.search(r"imageURL: (\S+)", text)
+
+        function = available[plan[done]]
+        args = {}
+        for arg in function.get("parameters", {}).get("properties", {}):
+            if arg == "user_id":
+                args[arg] = user_id
+            elif arg == "tool_input":
+                args[arg] = f"{user_id},benchmark issue"
+            elif arg == "imageURL":
+                args[arg] = image_url.group(1) if image_url else ""
+            else:
+                args[arg] = "benchmark"
+
+        return AIMessage(content="", tool_calls=[{"name": function["name"], "args": args, "id": f"call_{uuid.uuid4().hex[:8]}"}])
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"bound_tools": [convert_to_openai_tool(t) for t in tools]})
+
+    def with_structured_output(self, schema, **kwargs):
+        def respond(messages):
+            if hasattr(messages, "to_messages"):
+                messages = messages.to_messages()
+            # Through invoke so the call is rate limited, retried and accounted like a real one
+            self.invoke(messages)
+            return fake_structured_response(schema, message_text(messages))
+        return RunnableLambda(respond)
@@ -0,0 +1,147 @@
+import os
+import time
+import asyncio
+import threading
+import contextvars
+from functools import partial
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BoundedGraphExecutor:
+    """
+    Runs blocking graph invocations on a dedicated thread pool so they never
+    block the event loop, or awaits async invocations (arun) on the loop.
+
+    At most max_concurrency invocations run at the same time, the others wait
+    on a semaphore. Queue depth and wait times are tracked so workers can be sized.
+    """
+
+    def __init__(self, name: str, max_concurrency: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"{name}-graph")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = threading.Lock()
+
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Wait for a free slot and hold it, tracking queue and run times."""
+        enqueued_at = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+
+        try:
+            await self._semaphore.acquire()
+        except BaseException:
+            with self._lock:
+                self.queued -= 1
+            raise
+
+        started_at = time.perf_counter()
+        wait = started_at - enqueued_at
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+            self.total_wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.total_run_seconds += time.perf_counter() - started_at
+                if failed:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+            self._semaphore.release()
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) on the pool once a slot is free and return its result.
+        """
+        async with self._slot():
+            # Copy the context so request scoped context variables reach the worker thread
+            ctx = contextvars.copy_context()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, partial(ctx.run, func, *args, **kwargs))
+
+    async def arun(self, func, *args, **kwargs):
+        """
+        Await the coroutine function func(*args, **kwargs) on the event loop once a slot
+        is free, for graphs driven with ainvoke. Shares the slots and counters of run.
+        """
+        async with self._slot():
+            return await func(*args, **kwargs)
+
+    async def stream(self, func, *args, **kwargs):
+        """
+        Iterate the iterator returned by func(*args, **kwargs) on the pool and
+        yield its items on the event loop as they are produced.
+
+        The slot is held for the whole iteration. If the consumer stops early the
+        worker stops pulling further items.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def produce():
+            try:
+                for item in func(*args, **kwargs):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            except BaseException as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+            else:
+                loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+        # produce never raises, errors are handed over through the queue
+        asyncio.ensure_future(self.run(produce))
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is done:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            stop.set()
+
+    def stats(self) -> dict:
+        """Snapshot of the executor counters."""
+        with self._lock:
+            finished = self.completed + self.failed
+            started = finished + self.in_flight
+            return {
+                "max_concurrency": self.max_concurrency,
+                "queued": self.queued,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_seconds": round(self.total_wait_seconds / started, 4) if started else 0.0,
+                "max_wait_seconds": round(self.max_wait_seconds, 4),
+                "avg_run_seconds": round(self.total_run_seconds / finished, 4) if finished else 0.0,
+            }
+
+
+# Executors used by the FastAPI endpoints, sized through environment variables
+graph_executor = BoundedGraphExecutor("customer", int(os.getenv("GRAPH_MAX_CONCURRENCY", "4")))
+sop_executor = BoundedGraphExecutor("sop", int(os.getenv("SOP_GRAPH_MAX_CONCURRENCY", "4")))
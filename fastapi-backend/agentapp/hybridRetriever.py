@@ -0,0 +1,145 @@
+import os
+import re
+import math
+import threading
+from collections import Counter, defaultdict
+
+from langchain_core.documents import Document
+
+from agentapp.semanticCache import GENERATIONS_FILE, read_collection_generations
+
+# Words that carry no retrieval signal, numbers and IDs are always kept
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "to", "of", "in", "on", "for", "and", "or",
+    "my", "me", "i", "we", "you", "your", "it", "this", "that", "with", "how", "what", "can", "do",
+    "does", "did", "please", "at", "by", "from", "as", "has", "have", "had", "not", "so", "if",
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list:
+    """Lowercased word and number tokens without stopwords."""
+    return [token for token in TOKEN_PATTERN.findall((text or "").lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """In-memory Okapi BM25 inverted index over a list of documents."""
+
+    def __init__(self, documents: list, k1: float = 1.5, b: float = 0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+
+        self.postings = defaultdict(list)  # token -> [(doc index, term frequency)]
+        self.doc_lengths = []
+        for index, doc in enumerate(documents):
+            tokens = tokenize(doc.page_content)
+            self.doc_lengths.append(len(tokens))
+            for token, frequency in Counter(tokens).items():
+                self.postings[token].append((index, frequency))
+
+        self.avg_doc_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+        count = len(documents)
+        self.idf = {
+            token: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self.postings.items()
+        }
+
+    def search(self, query: str, k: int) -> list:
+        """Top k documents for the query, best first. Documents without a query token are not returned."""
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            idf = self.idf.get(token)
+            if idf is None:
+                continue
+            for index, frequency in self.postings[token]:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[index] / (self.avg_doc_length or 1.0)
+                scores[index] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [self.documents[index] for index, _ in ranked]
+
+
+def reciprocal_rank_fusion(rankings: list, k: int, rrf_k: int = 60) -> list:
+    """
+    Fuse ranked document lists, each document scores sum(1 / (rrf_k + rank)).
+    Documents are matched on their content so the same chunk from both lists counts once.
+    """
+    scores = defaultdict(float)
+    documents = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            scores[doc.page_content] += 1.0 / (rrf_k + rank)
+            documents.setdefault(doc.page_content, doc)
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+    return [documents[content] for content, _ in ranked]
+
+
+class HybridRetriever:
+    """
+    Vector similarity search fused with BM25 keyword search through reciprocal-rank fusion,
+    so exact tokens (policy numbers, "second name", SOP IDs) are found on the first pass.
+
+    The BM25 index is built from the chunks of the collection on first use and rebuilt when
+    the ingestion scripts bump the collection generation.
+    """
+
+    def __init__(self, vectorstore, collection_name: str, category: str, persist_directory: str,
+                 k: int = 3, fetch_k: int = 10, rrf_k: int = 60, hybrid: bool = True):
+        self.vectorstore = vectorstore
+        self.collection_name = collection_name
+        self.category = category
+        self.persist_directory = persist_directory
+        self.k = k
+        self.fetch_k = fetch_k
+        self.rrf_k = rrf_k
+        self.hybrid = hybrid
+
+        self._index = None
+        self._index_generation = None
+        self._generations_mtime = None
+        self._lock = threading.Lock()
+
+    def _collection_generation(self):
+        """Generation of the collection, re-reading the counters file only when it changed."""
+        path = os.path.join(self.persist_directory, GENERATIONS_FILE)
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        if mtime == self._generations_mtime and self._index is not None:
+            return self._index_generation
+        self._generations_mtime = mtime
+        return read_collection_generations(self.persist_directory).get(self.collection_name, 0)
+
+    def _build_index(self) -> BM25Index:
+        stored = self.vectorstore._collection.get(where={"category": self.category}, include=["documents", "metadatas"])
+        documents = [
+            Document(id=doc_id, page_content=content, metadata=metadata or {})
+            for doc_id, content, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+        ]
+        print(f"[INFO] BM25 index of {self.collection_name} built over {len(documents)} chunks")
+        return BM25Index(documents)
+
+    def index(self) -> BM25Index:
+        """The BM25 index, (re)built if missing or stale."""
+        with self._lock:
+            generation = self._collection_generation()
+            if self._index is None or generation != self._index_generation:
+                self._index = self._build_index()
+                self._index_generation = generation
+            return self._index
+
+    def warm_up(self):
+        if self.hybrid:
+            self.index()
+        return self
+
+    def invoke(self, query: str, k: int = None) -> list:
+        k = k or self.k
+        if not self.hybrid:
+            return self.vectorstore.similarity_search(query, k=k, filter={"category": self.category})
+
+        fetch_k = max(self.fetch_k, k)
+        vector_docs = self.vectorstore.similarity_search(query, k=fetch_k, filter={"category": self.category})
+        keyword_docs = self.index().search(query, fetch_k)
+        return reciprocal_rank_fusion([vector_docs, keyword_docs], k, self.rrf_k)
@@ -0,0 +1,270 @@
+"""
+Ingest many PDFs into the Chroma vectorstores.
+
+Pages are parsed in a process pool, new or changed chunks are embedded in large
+batches and written to Chroma in bulk. Unchanged PDFs (same hash in the ingest
+manifest) are skipped before parsing.
+
+Run as a module from the fastapi-backend dir:
+    python -m agentapp.ingest docs/*.pdf --map "*faq*=faq" --map "*sop*=issue_sop" --workers 4 --embed-batch-size 256
+
+agentapp.faqRagTraining / agentapp.issueRagTraining ingest the bundled PDFs through ingest_single.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import fnmatch
+import argparse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+if __name__ == "__main__" and not __package__:
+    sys.exit("Run from the fastapi-backend dir: python -m agentapp.ingest ...")
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_chroma import Chroma
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+
+from agentapp.semanticCache import bump_collection_generation
+from agentapp.embeddingCache import get_embedding_model
+from agentapp.ingestSync import file_sha256, is_unchanged, plan_sync, record_ingestion
+
+DEFAULT_PERSIST_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_db")
+
+# How a PDF is structured and where its chunks go, the only definition of the
+# block splitting, chunking and metadata of each collection
+PROFILES = {
+    "faq": {
+        "collection": "life_queries",
+        "category": "life-query",
+        "block_marker": "FAQ",
+        "id_key": "faq_id",
+        "separators": ["FAQ", "Answer", "Task", "\n\n", "\n", " "],
+    },
+    "issue_sop": {
+        "collection": "life_issue_sop",
+        "category": "life_issue_sop",
+        "block_marker": "ISSUE",
+        "id_key": "issue_id",
+        "separators": ["ISSUE", "Steps", "\n\n", "\n", " "],
+    },
+}
+
+# File name pattern -> profile, used when no --map / --mapping-file is given
+DEFAULT_MAPPING = {
+    "InsuranceFaq*.pdf": "faq",
+    "Insurance_issue_sop*.pdf": "issue_sop",
+}
+
+
+def parse_pdf(pdf_path: str, profile_name: str):
+    """
+    Load a PDF, split it into blocks and chunks. Runs in a worker process.
+
+    Returns:
+        (pdf_path, page_count, chunks)
+    """
+    profile = PROFILES[profile_name]
+    source = os.path.basename(pdf_path)
+    pages = PyPDFLoader(pdf_path).load()
+
+    structured_docs = []
+    for page in pages:
+        for block in page.page_content.split(profile["block_marker"]):
+            if block.strip():
+                structured_docs.append(
+                    Document(
+                        page_content=block.strip(),
+                        metadata={"source": source, profile["id_key"]: block.split(":")[0].strip(), "category": profile["category"]}
+                    )
+                )
+
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=700, chunk_overlap=100, separators=profile["separators"])
+    return pdf_path, len(pages), text_splitter.split_documents(structured_docs)
+
+
+def resolve_pdfs(paths):
+    """Expand directories and glob patterns into a sorted list of PDF paths."""
+    pdfs = set()
+    for path in paths:
+        if os.path.isdir(path):
+            pdfs.update(glob.glob(os.path.join(path, "**", "*.pdf"), recursive=True))
+        else:
+            pdfs.update(p for p in glob.glob(path, recursive=True) if p.lower().endswith(".pdf"))
+    return sorted(pdfs)
+
+
+def profile_for(pdf_path: str, mapping: dict):
+    """First profile whose pattern matches the file name (or full path), None if unmapped."""
+    for pattern, profile_name in mapping.items():
+        if fnmatch.fnmatch(os.path.basename(pdf_path), pattern) or fnmatch.fnmatch(pdf_path, pattern):
+            return profile_name
+    return None
+
+
+def batched(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def ingest(pdf_paths, mapping: dict, persist_directory: str = DEFAULT_PERSIST_DIRECTORY,
+           workers: int = None, embed_batch_size: int = 256):
+    """
+    Ingest the PDFs, returning throughput stats.
+    """
+    stats = {"files": 0, "skipped": 0, "pages": 0, "chunks": 0, "embedded": 0, "deleted": 0}
+
+    jobs = []
+    for pdf_path in pdf_paths:
+        profile_name = profile_for(pdf_path, mapping)
+        if profile_name is None:
+            print(f"[WARN] no collection mapping for {pdf_path}, skipping.")
+            continue
+        pdf_hash = file_sha256(pdf_path)
+        if is_unchanged(persist_directory, PROFILES[profile_name]["collection"], os.path.basename(pdf_path), pdf_hash):
+            stats["skipped"] += 1
+            continue
+        jobs.append((pdf_path, profile_name, pdf_hash))
+
+    print(f"[INFO] {len(jobs)} PDFs to ingest, {stats['skipped']} unchanged.")
+    if not jobs:
+        return stats
+
+    # 1. Parse pages in a process pool
+    parse_started = time.perf_counter()
+    parsed = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(parse_pdf, pdf_path, profile_name): (pdf_path, profile_name, pdf_hash)
+                   for pdf_path, profile_name, pdf_hash in jobs}
+        for future in as_completed(futures):
+            pdf_path, profile_name, pdf_hash = futures[future]
+            try:
+                _, page_count, chunks = future.result()
+            except Exception as e:
+                print(f"[ERROR] failed to parse {pdf_path}: {e}")
+                continue
+            stats["files"] += 1
+            stats["pages"] += page_count
+            stats["chunks"] += len(chunks)
+            parsed.append((pdf_path, profile_name, pdf_hash, chunks))
+    parse_seconds = time.perf_counter() - parse_started
+
+    # 2. Work out what changed per file, grouped per collection
+    embedding_model = get_embedding_model()
+    vectorstores = {}
+    pending = defaultdict(list)
+    stale = defaultdict(list)
+    manifest_records = defaultdict(list)
+    for pdf_path, profile_name, pdf_hash, chunks in parsed:
+        profile = PROFILES[profile_name]
+        if profile["collection"] not in vectorstores:
+            vectorstores[profile["collection"]] = Chroma(
+                collection_name=profile["collection"],
+                embedding_function=embedding_model,
+                persist_directory=persist_directory
+            )
+        vectorstore = vectorstores[profile["collection"]]
+
+        wanted, added_ids, deleted_ids = plan_sync(vectorstore, chunks, profile["category"], os.path.basename(pdf_path))
+        stale[profile["collection"]].extend(deleted_ids)
+        pending[profile["collection"]].extend((doc_id, wanted[doc_id]) for doc_id in added_ids)
+        record_args = (persist_directory, profile["collection"], os.path.basename(pdf_path), pdf_hash, profile["category"], list(wanted))
+        manifest_records[profile["collection"]].append((record_args, bool(added_ids or deleted_ids)))
+
+    # 3. Embed in large batches and write to Chroma in bulk, stale chunks are deleted only
+    # once their replacements are stored so a failed embedding call loses no documents
+    embed_seconds = 0.0
+    for collection_name, vectorstore in vectorstores.items():
+        items = pending[collection_name]
+        max_write_batch = vectorstore._client.get_max_batch_size()
+        for batch in batched(items, embed_batch_size):
+            texts = [doc.page_content for _, doc in batch]
+            embed_started = time.perf_counter()
+            embeddings = embedding_model.embed_documents(texts)
+            embed_seconds += time.perf_counter() - embed_started
+            stats["embedded"] += len(texts)
+
+            for write_start in range(0, len(batch), max_write_batch):
+                write_batch = batch[write_start:write_start + max_write_batch]
+                vectorstore._collection.upsert(
+                    ids=[doc_id for doc_id, _ in write_batch],
+                    embeddings=embeddings[write_start:write_start + max_write_batch],
+                    metadatas=[doc.metadata for _, doc in write_batch],
+                    documents=[doc.page_content for _, doc in write_batch]
+                )
+
+        if stale[collection_name]:
+            vectorstore.delete(ids=stale[collection_name])
+            stats["deleted"] += len(stale[collection_name])
+
+        # Manifest is written only after the collection's chunks are stored
+        changed = False
+        for record_args, file_changed in manifest_records[collection_name]:
+            record_ingestion(*record_args)
+            changed = changed or file_changed
+        if changed:
+            # Invalidate cached answers served from this collection
+            bump_collection_generation(persist_directory, collection_name)
+
+    total_seconds = time.perf_counter() - parse_started
+    stats.update({
+        "parse_seconds": round(parse_seconds, 3),
+        "embed_seconds": round(embed_seconds, 3),
+        "total_seconds": round(total_seconds, 3),
+        "pages_per_second": round(stats["pages"] / parse_seconds, 2) if parse_seconds else 0.0,
+        "chunks_per_second": round(stats["chunks"] / total_seconds, 2) if total_seconds else 0.0,
+        "embeddings_per_second": round(stats["embedded"] / embed_seconds, 2) if embed_seconds else 0.0,
+    })
+    return stats
+
+
+def ingest_single(pdf_path: str, profile_name: str, persist_directory: str = DEFAULT_PERSIST_DIRECTORY):
+    """Ingest one PDF with the given profile, prints the stats and, with INGEST_DEBUG, the stored chunks."""
+    stats = ingest([pdf_path], {os.path.basename(pdf_path): profile_name}, persist_directory, workers=1)
+    print(f"[SUCCESS] ingestion stats: {json.dumps(stats)}")
+
+    # Opens the vectorstore, so only on request
+    if os.getenv("INGEST_DEBUG"):
+        profile = PROFILES[profile_name]
+        vectorstore = Chroma(
+            collection_name=profile["collection"],
+            embedding_function=get_embedding_model(),
+            persist_directory=persist_directory
+        )
+        print(f"existing_docs: {vectorstore._collection.get(where={'category': profile['category']})}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest PDFs into the Chroma vectorstores")
+    parser.add_argument("paths", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("--map", action="append", default=[], metavar="PATTERN=PROFILE",
+                        help=f"file name pattern to profile ({', '.join(PROFILES)}), can be repeated")
+    parser.add_argument("--mapping-file", default=None, help="JSON file of {pattern: profile}")
+    parser.add_argument("--persist-directory", default=DEFAULT_PERSIST_DIRECTORY)
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--embed-batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    mapping = {}
+    if args.mapping_file:
+        with open(args.mapping_file, "r") as f:
+            mapping.update(json.load(f))
+    for item in args.map:
+        pattern, _, profile_name = item.partition("=")
+        mapping[pattern] = profile_name
+    mapping = mapping or DEFAULT_MAPPING
+
+    unknown = set(mapping.values()) - set(PROFILES)
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(sorted(unknown))}")
+
+    stats = ingest(resolve_pdfs(args.paths), mapping, args.persist_directory, args.workers, args.embed_batch_size)
+    print(f"[SUCCESS] ingestion stats: {json.dumps(stats)}")
+
+
+if __name__ == "__main__":
+    main()
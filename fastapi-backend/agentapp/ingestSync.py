@@ -0,0 +1,87 @@
+import os
+import json
+import time
+import hashlib
+
+# Manifest of ingested source PDFs, kept next to the Chroma data
+MANIFEST_FILE = "ingest_manifest.json"
+
+
+def file_sha256(path: str) -> str:
+    """Content hash of a source file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(doc) -> str:
+    """Deterministic chunk ID derived from the chunk content and its metadata."""
+    payload = json.dumps({"content": doc.page_content, "metadata": doc.metadata}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_manifest(persist_directory: str) -> dict:
+    path = os.path.join(persist_directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(persist_directory: str, manifest: dict):
+    os.makedirs(persist_directory, exist_ok=True)
+    path = os.path.join(persist_directory, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def manifest_key(collection_name: str, source: str) -> str:
+    return f"{collection_name}/{source}"
+
+
+def is_unchanged(persist_directory: str, collection_name: str, source: str, source_hash: str) -> bool:
+    """True if the source was already ingested into the collection with the same content hash."""
+    entry = load_manifest(persist_directory).get(manifest_key(collection_name, source))
+    return entry is not None and entry["sha256"] == source_hash
+
+
+def record_ingestion(persist_directory: str, collection_name: str, source: str, source_hash: str,
+                     category: str, chunk_ids: list):
+    """Record the ingested source hash and its chunk count in the manifest."""
+    manifest = load_manifest(persist_directory)
+    manifest[manifest_key(collection_name, source)] = {
+        "sha256": source_hash,
+        "category": category,
+        "chunks": len(chunk_ids),
+        "ingested_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    save_manifest(persist_directory, manifest)
+
+
+def plan_sync(vectorstore, chunks, category: str, source: str):
+    """
+    Compare the chunks of a source with what the collection holds.
+    Chunks of the category stored without a source (legacy ingestion) count as part of the source.
+
+    Returns:
+        (wanted, added_ids, deleted_ids): wanted maps chunk ID -> chunk
+    """
+    # Identical chunks map to the same ID, keep one
+    wanted = {}
+    for chunk in chunks:
+        wanted.setdefault(chunk_id(chunk), chunk)
+
+    existing = vectorstore._collection.get(where={"category": category}, include=["metadatas"])
+    existing_ids = {
+        doc_id for doc_id, metadata in zip(existing["ids"], existing["metadatas"])
+        if (metadata or {}).get("source", source) == source
+    }
+
+    added_ids = [doc_id for doc_id in wanted if doc_id not in existing_ids]
+    deleted_ids = [doc_id for doc_id in existing_ids if doc_id not in wanted]
+    return wanted, added_ids, deleted_ids
+
@@ -0,0 +1,412 @@
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+
+from agentapp.metrics import LLM_RETRIES, LLM_THROTTLE_SECONDS
+
+# groq (default) or fake, the deterministic offline backend of agentapp.fakeLLM
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq").lower()
+
+# Per model limits, e.g. {"openai/gpt-oss-120b": {"rpm": 30, "tpm": 8000}}, 0 disables a limit
+LLM_RATE_LIMITS = json.loads(os.getenv("LLM_RATE_LIMITS", "{}"))
+LLM_DEFAULT_RPM = float(os.getenv("LLM_DEFAULT_RPM", "0"))
+LLM_DEFAULT_TPM = float(os.getenv("LLM_DEFAULT_TPM", "0"))
+# Completion tokens reserved per call before the real usage is known
+LLM_COMPLETION_TOKENS_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "256"))
+
+# Retries on 429, 5xx and connection errors with full-jitter exponential backoff
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "20"))
+
+# Connection pool shared by all Groq clients
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+RETRYABLE_ERRORS = ("APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError")
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at per_minute / 60 per second.
+    Callers reserve up front and wait the returned time, so no lock is held while waiting.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take amount (capped at the capacity) and return the seconds to wait before using it."""
+        if self.capacity <= 0:
+            return 0.0
+        with self._lock:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+            return max(0.0, -self.tokens / self.rate)
+
+    def adjust(self, amount: float):
+        """Take (positive) or give back (negative) tokens once the real usage is known."""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class ModelLimiter:
+    """Requests and tokens per minute of one model."""
+
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    def reserve(self, tokens: int) -> float:
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+
+class ModelStats:
+    """Per model call, retry, latency and usage accounting."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self.latency_seconds = 0.0
+        self.max_latency_seconds = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, latency: float, usage: dict, failed: bool = False):
+        with self.lock:
+            self.calls += 1
+            self.errors += int(failed)
+            self.latency_seconds += latency
+            self.max_latency_seconds = max(self.max_latency_seconds, latency)
+            self.prompt_tokens += usage.get("prompt_tokens", 0)
+            self.completion_tokens += usage.get("completion_tokens", 0)
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "retries": self.retries,
+                "throttled_seconds": round(self.throttled_seconds, 3),
+                "avg_latency_seconds": round(self.latency_seconds / self.calls, 4) if self.calls else 0.0,
+                "max_latency_seconds": round(self.max_latency_seconds, 4),
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+
+def estimate_tokens(messages) -> int:
+    """About four characters per token for the prompt, plus the completion estimate."""
+    return sum(len(str(getattr(m, "content", m))) for m in messages) // 4 + LLM_COMPLETION_TOKENS_ESTIMATE
+
+
+def usage_of(result) -> dict:
+    """Prompt/completion tokens of a ChatResult or message chunk, {} if the backend did not report them."""
+    usage = (getattr(result, "llm_output", None) or {}).get("token_usage")
+    if usage:
+        return {"prompt_tokens": usage.get("prompt_tokens", 0), "completion_tokens": usage.get("completion_tokens", 0)}
+
+    generations = getattr(result, "generations", None)
+    message = generations[0].message if generations else getattr(result, "message", None)
+    metadata = getattr(message, "usage_metadata", None)
+    if metadata:
+        return {"prompt_tokens": metadata.get("input_tokens", 0), "completion_tokens": metadata.get("output_tokens", 0)}
+    return {}
+
+
+def is_retryable(error: Exception) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Full-jitter backoff, never shorter than the Retry-After header of a 429."""
+    delay = random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * (2 ** attempt)))
+    response = getattr(error, "response", None)
+    retry_after = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    try:
+        return max(delay, float(retry_after)) if retry_after else delay
+    except ValueError:
+        return delay
+
+
+def gateway_model_name(chat_model) -> str:
+    return getattr(chat_model, "model_name", None) or getattr(chat_model, "model", None) or "unknown"
+
+
+def gateway_methods(cls) -> dict:
+    """
+    Overrides routing every generation of a chat model class through the gateway: the
+    model's rate limiter before the call, retries on transient errors and usage accounting.
+    Chains built with with_structured_output / bind_tools end up here too.
+
+    Only methods the class implements itself are wrapped, the BaseChatModel fallbacks
+    (async via a thread, stream via generate) already reach a wrapped method.
+    """
+    from langchain_core.language_models.chat_models import BaseChatModel
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return llm_gateway.call(gateway_model_name(self), messages,
+                                lambda: cls._generate(self, messages, stop=stop, run_manager=run_manager, **kwargs))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        return await llm_gateway.acall(gateway_model_name(self), messages,
+                                       lambda: cls._agenerate(self, messages, stop=stop, run_manager=run_manager, **kwargs))
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        yield from llm_gateway.call_stream(gateway_model_name(self), messages,
+                                           lambda: cls._stream(self, messages, stop=stop, run_manager=run_manager, **kwargs))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        async for chunk in llm_gateway.acall_stream(gateway_model_name(self), messages,
+                                                    lambda: cls._astream(self, messages, stop=stop, run_manager=run_manager, **kwargs)):
+            yield chunk
+
+    methods = {"_generate": _generate, "_agenerate": _agenerate, "_stream": _stream, "_astream": _astream}
+    return {name: method for name, method in methods.items() if getattr(cls, name) is not getattr(BaseChatModel, name)}
+
+
+class LLMGateway:
+    """
+    Single entry point for LLM calls.
+
+    Chat models are shared per (model, temperature) and the Groq clients share one
+    HTTP connection pool. Every call waits for the model's token buckets (requests
+    and tokens per minute), is retried with jittered backoff on 429/5xx and has its
+    latency and token usage accounted per model.
+    """
+
+    def __init__(self, backend: str = LLM_BACKEND):
+        self.backend = backend
+        self._models = {}
+        self._classes = {}
+        self._limiters = {}
+        self._stats = {}
+        self._http_clients = None
+        self._lock = threading.Lock()
+
+    def use_fake_backend(self, latency: float = 0.0):
+        """Serve every model from the offline fake. Must run before the graph modules create their models."""
+        from agentapp.fakeLLM import FakeChatGroq
+
+        FakeChatGroq.default_latency = latency
+        os.environ.setdefault("GROQ_API_KEY", "fake-key")
+        with self._lock:
+            self.backend = "fake"
+            self._models.clear()
+
+    def _gateway_class(self, cls):
+        if cls not in self._classes:
+            self._classes[cls] = type(f"Gateway{cls.__name__}", (cls,), gateway_methods(cls))
+        return self._classes[cls]
+
+    def _shared_http_clients(self):
+        if self._http_clients is None:
+            import httpx
+
+            limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS)
+            self._http_clients = (
+                httpx.Client(limits=limits, timeout=LLM_TIMEOUT_SECONDS),
+                httpx.AsyncClient(limits=limits, timeout=LLM_TIMEOUT_SECONDS)
+            )
+        return self._http_clients
+
+    def _create_model(self, model: str, temperature: float):
+        if self.backend == "fake":
+            from agentapp.fakeLLM import FakeChatGroq
+            return self._gateway_class(FakeChatGroq)(model=model, temperature=temperature)
+
+        from langchain_groq import ChatGroq
+
+        http_client, http_async_client = self._shared_http_clients()
+        # Retries are done by the gateway, not by the Groq SDK
+        return self._gateway_class(ChatGroq)(
+            model=model,
+            temperature=temperature,
+            max_retries=0,
+            http_client=http_client,
+            http_async_client=http_async_client
+        )
+
+    def chat_model(self, model: str, temperature: float = 0):
+        """The shared chat model for the model name (case-insensitive) and temperature."""
+        key = (model.lower(), temperature)
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = self._create_model(model, temperature)
+            return self._models[key]
+
+    def _limiter(self, model: str) -> ModelLimiter:
+        key = model.lower()
+        with self._lock:
+            if key not in self._limiters:
+                limits = LLM_RATE_LIMITS.get(model) or LLM_RATE_LIMITS.get(key) or {}
+                self._limiters[key] = ModelLimiter(limits.get("rpm", LLM_DEFAULT_RPM), limits.get("tpm", LLM_DEFAULT_TPM))
+                self._stats[key] = ModelStats()
+            return self._limiters[key]
+
+    def _model_stats(self, model: str) -> ModelStats:
+        self._limiter(model)
+        return self._stats[model.lower()]
+
+    def _reserve(self, model: str, estimated_tokens: int) -> float:
+        wait = self._limiter(model).reserve(estimated_tokens)
+        if wait:
+            stats = self._model_stats(model)
+            with stats.lock:
+                stats.throttled_seconds += wait
+            LLM_THROTTLE_SECONDS.labels(model).inc(wait)
+        return wait
+
+    def _settle(self, model: str, estimated_tokens: int, started: float, usage: dict, failed: bool = False):
+        """Correct the token bucket with the real usage and account the call."""
+        if usage:
+            self._limiter(model).tokens.adjust(usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0) - estimated_tokens)
+        self._model_stats(model).record(time.perf_counter() - started, usage, failed)
+
+    def _should_retry(self, model: str, error: Exception, attempt: int, estimated_tokens: int):
+        """Seconds to wait before the next attempt, None if the error is final."""
+        if attempt >= LLM_MAX_RETRIES or not is_retryable(error):
+            return None
+        # The failed attempt used no tokens, the next one reserves them again
+        self._limiter(model).tokens.adjust(-estimated_tokens)
+        stats = self._model_stats(model)
+        with stats.lock:
+            stats.retries += 1
+        LLM_RETRIES.labels(model, type(error).__name__).inc()
+        delay = retry_delay(error, attempt)
+        print(f"[WARN] LLM call to {model} failed ({error}), retry {attempt + 1}/{LLM_MAX_RETRIES} in {delay:.2f}s")
+        return delay
+
+    def call(self, model: str, messages, generate):
+        estimated = estimate_tokens(messages)
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            wait = self._reserve(model, estimated)
+            if wait:
+                time.sleep(wait)
+            try:
+                result = generate()
+            except Exception as e:
+                delay = self._should_retry(model, e, attempt, estimated)
+                if delay is None:
+                    self._settle(model, estimated, started, {}, failed=True)
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self._settle(model, estimated, started, usage_of(result))
+            return result
+
+    async def acall(self, model: str, messages, agenerate):
+        estimated = estimate_tokens(messages)
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            wait = self._reserve(model, estimated)
+            if wait:
+                await asyncio.sleep(wait)
+            try:
+                result = await agenerate()
+            except Exception as e:
+                delay = self._should_retry(model, e, attempt, estimated)
+                if delay is None:
+                    self._settle(model, estimated, started, {}, failed=True)
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self._settle(model, estimated, started, usage_of(result))
+            return result
+
+    def call_stream(self, model: str, messages, stream):
+        """Stream chunks, retrying only while nothing was yielded yet."""
+        estimated = estimate_tokens(messages)
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            wait = self._reserve(model, estimated)
+            if wait:
+                time.sleep(wait)
+            usage, yielded = {}, False
+            try:
+                for chunk in stream():
+                    yielded = True
+                    usage = usage_of(chunk) or usage
+                    yield chunk
+            except Exception as e:
+                delay = None if yielded else self._should_retry(model, e, attempt, estimated)
+                if delay is None:
+                    self._settle(model, estimated, started, usage, failed=True)
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self._settle(model, estimated, started, usage)
+            return
+
+    async def acall_stream(self, model: str, messages, astream):
+        """Async stream chunks, retrying only while nothing was yielded yet."""
+        estimated = estimate_tokens(messages)
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            wait = self._reserve(model, estimated)
+            if wait:
+                await asyncio.sleep(wait)
+            usage, yielded = {}, False
+            try:
+                async for chunk in astream():
+                    yielded = True
+                    usage = usage_of(chunk) or usage
+                    yield chunk
+            except Exception as e:
+                delay = None if yielded else self._should_retry(model, e, attempt, estimated)
+                if delay is None:
+                    self._settle(model, estimated, started, usage, failed=True)
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self._settle(model, estimated, started, usage)
+            return
+
+    def stats(self) -> dict:
+        """Per model accounting, plus the backend and the number of shared models."""
+        with self._lock:
+            stats = dict(self._stats)
+            models = len(self._models)
+        return {
+            "backend": self.backend,
+            "shared_models": models,
+            "models": {model: model_stats.as_dict() for model, model_stats in stats.items()}
+        }
+
+
+llm_gateway = LLMGateway()
+
+
+def get_chat_model(model: str, temperature: float = 0):
+    """Shared, rate limited and retried chat model, see LLMGateway."""
+    return llm_gateway.chat_model(model, temperature)
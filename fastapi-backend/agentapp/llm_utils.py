@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
+from agentapp.llmGateway import get_chat_model
 
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
@@ -11,7 +11,7 @@ if groq_api_key:
 else:
     raise ValueError("GROQ_API_KEY environment variable is not set")
 
-llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0)
+llm = get_chat_model("llama-3.3-70b-versatile", temperature=0)
 
 def callGroq(messages):
     """Call Groq LLM with messages"""
@@ -0,0 +1,174 @@
+import os
+import json
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from agentapp.metrics import ROUTER_DECISIONS, ROUTER_AGREEMENT
+
+EXAMPLES_PATH = os.path.join(os.path.dirname(__file__), "router_examples.json")
+
+# Route questions locally and call the LLM routers only below the confidence threshold
+LOCAL_ROUTER_ENABLED = os.getenv("LOCAL_ROUTER", "true").lower() == "true"
+# Labelled examples, {task: {label: [questions]}}, defaults to the bootstrap set shipped with the repo
+LOCAL_ROUTER_EXAMPLES_PATH = os.getenv("LOCAL_ROUTER_EXAMPLES_PATH", EXAMPLES_PATH)
+# Min softmax probability of the best label to skip the LLM router
+LOCAL_ROUTER_CONFIDENCE = float(os.getenv("LOCAL_ROUTER_CONFIDENCE", "0.8"))
+# Fraction of confident local decisions also sent to the LLM router to measure agreement,
+# in the background: the local decision is used either way
+LOCAL_ROUTER_SHADOW_RATE = float(os.getenv("LOCAL_ROUTER_SHADOW_RATE", "0.0"))
+# Shadow comparisons waiting or running at most, further samples are dropped
+LOCAL_ROUTER_SHADOW_MAX_PENDING = 16
+# Softmax temperature over cosine similarities
+LOCAL_ROUTER_TEMPERATURE = 0.05
+
+
+class CentroidRouter:
+    """
+    Nearest-centroid classifier over the shared MiniLM embeddings.
+
+    Each routing task (supervisor, rag_route) has one normalized centroid per label,
+    averaged from the labelled example questions. A question is routed to the label
+    with the most similar centroid, with a softmax over the similarities as confidence.
+    """
+
+    def __init__(self, embedding_model, examples_path: str = LOCAL_ROUTER_EXAMPLES_PATH,
+                 confidence: float = LOCAL_ROUTER_CONFIDENCE, shadow_rate: float = LOCAL_ROUTER_SHADOW_RATE):
+        self.embedding_model = embedding_model
+        self.examples_path = examples_path
+        self.confidence = confidence
+        self.shadow_rate = shadow_rate
+
+        self._centroids = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+        self._shadow_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="router-shadow")
+        self._shadow_pending = 0
+
+    def train(self):
+        """Compute the label centroids of every task from the examples file."""
+        with open(self.examples_path, "r") as f:
+            examples = json.load(f)
+
+        centroids = {}
+        for task, labels in examples.items():
+            names = list(labels)
+            vectors = []
+            for name in names:
+                embeddings = np.asarray(self.embedding_model.embed_documents(labels[name]), dtype=np.float32)
+                embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+                centroid = embeddings.mean(axis=0)
+                vectors.append(centroid / (np.linalg.norm(centroid) or 1.0))
+            centroids[task] = (names, np.stack(vectors))
+
+        print(f"[INFO] local router trained: {', '.join(f'{task}={len(names)} labels' for task, (names, _) in centroids.items())}")
+        return centroids
+
+    def centroids(self) -> dict:
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    self._centroids = self.train()
+        return self._centroids
+
+    def warm_up(self):
+        self.centroids()
+        return self
+
+    def classify(self, task: str, question: str):
+        """
+        Returns:
+            (label, confidence)
+        """
+        names, centroids = self.centroids()[task]
+        embedding = np.asarray(self.embedding_model.embed_query(question), dtype=np.float32)
+        embedding /= (np.linalg.norm(embedding) or 1.0)
+
+        similarities = centroids @ embedding
+        weights = np.exp((similarities - similarities.max()) / LOCAL_ROUTER_TEMPERATURE)
+        probabilities = weights / weights.sum()
+        best = int(np.argmax(probabilities))
+        return names[best], float(probabilities[best])
+
+    def _record(self, task: str, stat: str):
+        with self._stats_lock:
+            task_stats = self._stats.setdefault(task, {"local": 0, "llm_fallback": 0, "compared": 0, "agreed": 0})
+            task_stats[stat] += 1
+
+    def _compare(self, task: str, label: str, llm_label: str):
+        agreed = llm_label == label
+        self._record(task, "compared")
+        if agreed:
+            self._record(task, "agreed")
+        ROUTER_AGREEMENT.labels(task, "yes" if agreed else "no").inc()
+        print(f"[INFO] local router {task}: {label}, LLM router: {llm_label}")
+
+    def _shadow(self, task: str, question: str, label: str, llm_route):
+        """Compare a confident local decision with the LLM router off the request path."""
+        with self._stats_lock:
+            if self._shadow_pending >= LOCAL_ROUTER_SHADOW_MAX_PENDING:
+                return
+            self._shadow_pending += 1
+
+        def compare():
+            try:
+                self._compare(task, label, llm_route(question))
+            except Exception as e:
+                print(f"[ERROR] shadow LLM router {task} failed: {e}")
+            finally:
+                with self._stats_lock:
+                    self._shadow_pending -= 1
+
+        ROUTER_DECISIONS.labels(task, "shadow").inc()
+        self._shadow_pool.submit(compare)
+
+    def route(self, task: str, question: str, llm_route):
+        """
+        Route the question locally, falling back to llm_route(question) -> label when the
+        local confidence is below the threshold. The agreement of both answers is recorded
+        on fallbacks and on shadow samples, which call llm_route in the background and
+        still use the local label. An unusable local router (examples missing,
+        embedding failure) always falls back.
+
+        Returns:
+            label
+        """
+        if not LOCAL_ROUTER_ENABLED:
+            return llm_route(question)
+
+        try:
+            label, confidence = self.classify(task, question)
+        except Exception as e:
+            print(f"[ERROR] local router {task} failed, using the LLM router: {e}")
+            return llm_route(question)
+
+        if confidence >= self.confidence:
+            self._record(task, "local")
+            ROUTER_DECISIONS.labels(task, "local").inc()
+            print(f"[INFO] local router {task}: {label} ({confidence:.2f})")
+            if random.random() < self.shadow_rate:
+                self._shadow(task, question, label, llm_route)
+            return label
+
+        llm_label = llm_route(question)
+        self._record(task, "llm_fallback")
+        ROUTER_DECISIONS.labels(task, "llm_fallback").inc()
+        print(f"[INFO] local router {task}: low confidence ({confidence:.2f})")
+        self._compare(task, label, llm_label)
+        return llm_label
+
+    def stats(self) -> dict:
+        """Per task decision counts, fallback rate and agreement rate with the LLM router."""
+        with self._stats_lock:
+            result = {}
+            for task, task_stats in self._stats.items():
+                decisions = task_stats["local"] + task_stats["llm_fallback"]
+                result[task] = {
+                    **task_stats,
+                    "fallback_rate": round(task_stats["llm_fallback"] / decisions, 3) if decisions else 0.0,
+                    "agreement_rate": round(task_stats["agreed"] / task_stats["compared"], 3) if task_stats["compared"] else None,
+                }
+            return result
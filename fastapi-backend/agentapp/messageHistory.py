@@ -0,0 +1,162 @@
+import os
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+# Hard ceiling of the estimated prompt tokens of one SOP assistant step
+SOP_PROMPT_MAX_TOKENS = int(os.getenv("SOP_PROMPT_MAX_TOKENS", "6000"))
+# Size budget of the latest tool result, longer results are truncated
+SOP_TOOL_RESULT_MAX_CHARS = int(os.getenv("SOP_TOOL_RESULT_MAX_CHARS", "2000"))
+# Size budget of older tool results, they are summarized down to it
+SOP_OLD_TOOL_RESULT_MAX_CHARS = int(os.getenv("SOP_OLD_TOOL_RESULT_MAX_CHARS", "400"))
+# Max chars of a single value kept when a JSON tool result is summarized
+SUMMARY_VALUE_MAX_CHARS = 80
+# additional_kwargs key of the compaction note listing the tool calls it replaces
+COMPACTED_TOOL_CALLS_KEY = "compacted_tool_calls"
+
+
+def approx_tokens(messages) -> int:
+    """About four characters per token, like the gateway estimate, tool call arguments included."""
+    chars = 0
+    for message in messages:
+        chars += len(str(getattr(message, "content", message)))
+        chars += len(str(getattr(message, "tool_calls", None) or ""))
+    return chars // 4
+
+
+def truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [{len(text) - max_chars} chars truncated]"
+
+
+def truncate_message(message, cut: int):
+    """Copy of the message with cut chars less content."""
+    content = str(message.content)
+    return message.model_copy(update={"content": truncate(content, max(0, len(content) - cut))})
+
+
+def summarize_tool_result(content, max_chars: int) -> str:
+    """
+    Deterministic summary of a tool result: long values of a JSON object are
+    shortened before the whole result is truncated to max_chars.
+    """
+    text = content if isinstance(content, str) else json.dumps(content, default=str)
+    if len(text) <= max_chars:
+        return text
+
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        return truncate(text, max_chars)
+
+    if isinstance(parsed, dict):
+        summary = {}
+        for key, value in parsed.items():
+            value = value if isinstance(value, str) else json.dumps(value, default=str)
+            summary[key] = truncate(value, SUMMARY_VALUE_MAX_CHARS)
+        text = json.dumps(summary, ensure_ascii=False, separators=(",", ":"))
+    return truncate(text, max_chars)
+
+
+def dedupe_messages(messages) -> list:
+    """
+    Drop repeated messages: the same id twice, a second result of the same tool
+    call, and an assistant text repeating the previous assistant text.
+    """
+    seen_ids, seen_tool_calls = set(), set()
+    last_ai_text = None
+    result = []
+    for message in messages:
+        message_id = getattr(message, "id", None)
+        if message_id is not None:
+            if message_id in seen_ids:
+                continue
+            seen_ids.add(message_id)
+
+        if isinstance(message, ToolMessage):
+            if message.tool_call_id in seen_tool_calls:
+                continue
+            seen_tool_calls.add(message.tool_call_id)
+        elif isinstance(message, AIMessage) and not message.tool_calls:
+            if message.content and message.content == last_ai_text:
+                continue
+            last_ai_text = message.content
+        result.append(message)
+    return result
+
+
+def split_rounds(messages) -> list:
+    """Group the history into rounds: an assistant message with the tool results answering it."""
+    rounds = []
+    for message in messages:
+        if isinstance(message, ToolMessage) and rounds:
+            rounds[-1].append(message)
+        else:
+            rounds.append([message])
+    return rounds
+
+
+def compaction_note(dropped) -> HumanMessage:
+    """
+    One line per tool call of the dropped rounds, so the assistant knows which steps already ran.
+    The replaced tool calls are also listed under COMPACTED_TOOL_CALLS_KEY of additional_kwargs.
+    """
+    messages = [message for r in dropped for message in r]
+    results = {
+        message.tool_call_id: summarize_tool_result(message.content, SUMMARY_VALUE_MAX_CHARS)
+        for message in messages if isinstance(message, ToolMessage)
+    }
+    tool_calls = [tool_call for message in messages for tool_call in getattr(message, "tool_calls", None) or []]
+
+    lines = ["Earlier steps (compacted):"]
+    lines += [f"- {tool_call['name']} -> {results.get(tool_call['id'], 'no result')}" for tool_call in tool_calls]
+    return HumanMessage(content="\n".join(lines), additional_kwargs={COMPACTED_TOOL_CALLS_KEY: tool_calls})
+
+
+def compact_history(messages, prefix_messages, max_tokens: int = SOP_PROMPT_MAX_TOKENS) -> list:
+    """
+    Compact the message history sent after prefix_messages (which are never changed,
+    so the prompt prefix stays byte-stable for provider-side prompt caching).
+
+    Duplicates are dropped, the latest tool result is truncated to SOP_TOOL_RESULT_MAX_CHARS
+    and older ones summarized to SOP_OLD_TOOL_RESULT_MAX_CHARS. Above max_tokens the
+    oldest rounds are replaced by a one line per step note, then the remaining tool
+    results and the note are cut to fit. The messages of the state are never modified.
+
+    Raises:
+        ValueError: the prompt is still over max_tokens, it is never sent over the ceiling
+    """
+    history = dedupe_messages(messages)
+    tool_indexes = [i for i, message in enumerate(history) if isinstance(message, ToolMessage)]
+    for i in tool_indexes:
+        max_chars = SOP_TOOL_RESULT_MAX_CHARS if i == tool_indexes[-1] else SOP_OLD_TOOL_RESULT_MAX_CHARS
+        content = summarize_tool_result(history[i].content, max_chars)
+        if content != history[i].content:
+            history[i] = history[i].model_copy(update={"content": content})
+
+    budget = max_tokens - approx_tokens(prefix_messages)
+    rounds = split_rounds(history)
+    dropped, note = [], []
+    while len(rounds) > 1 and approx_tokens(note + [m for r in rounds for m in r]) > budget:
+        dropped.append(rounds.pop(0))
+        note = [compaction_note(dropped)]
+    history = note + [message for r in rounds for message in r]
+
+    overflow = approx_tokens(history) - budget
+    tool_indexes = [i for i, message in enumerate(history) if isinstance(message, ToolMessage)]
+    if overflow > 0 and tool_indexes:
+        # A single round over the budget, cut its tool results evenly (room for the truncation marker)
+        cut = (overflow * 4) // len(tool_indexes) + 40
+        for i in tool_indexes:
+            history[i] = truncate_message(history[i], cut)
+
+    overflow = approx_tokens(history) - budget
+    if overflow > 0 and note:
+        # Then the note of the compacted steps, its structured tool call list stays intact
+        history[0] = truncate_message(history[0], overflow * 4 + 40)
+
+    tokens = approx_tokens(prefix_messages) + approx_tokens(history)
+    if tokens > max_tokens:
+        raise ValueError(f"SOP prompt needs ~{tokens} tokens after compaction, over the {max_tokens} token ceiling")
+    return history
@@ -0,0 +1,250 @@
+import time
+import inspect
+import threading
+import contextvars
+from functools import wraps
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from langchain_core.callbacks import BaseCallbackHandler
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+NODE_LATENCY = Histogram("graph_node_latency_seconds", "Latency of graph nodes", ["graph", "node"], buckets=LATENCY_BUCKETS)
+NODE_ERRORS = Counter("graph_node_errors_total", "Graph node failures", ["graph", "node"])
+NODE_IN_FLIGHT = Gauge("graph_node_in_flight", "Graph nodes currently running", ["graph", "node"])
+
+REQUEST_LATENCY = Histogram("graph_request_latency_seconds", "Latency of whole graph runs", ["graph"], buckets=LATENCY_BUCKETS)
+REQUEST_ERRORS = Counter("graph_request_errors_total", "Failed graph runs", ["graph"])
+REQUESTS_IN_FLIGHT = Gauge("graph_requests_in_flight", "Graph runs currently running", ["graph"])
+REQUEST_LOOPS = Histogram(
+    "graph_request_loop_iterations", "Loop iterations (query rewrites, tool rounds) per graph run",
+    ["graph"], buckets=(0, 1, 2, 3, 5, 8, 13, 21)
+)
+
+LLM_LATENCY = Histogram("llm_call_latency_seconds", "Latency of LLM calls", ["model"], buckets=LATENCY_BUCKETS)
+LLM_ERRORS = Counter("llm_call_errors_total", "Failed LLM calls", ["model"])
+LLM_IN_FLIGHT = Gauge("llm_calls_in_flight", "LLM calls currently running", ["model"])
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens used by LLM calls", ["model", "type"])
+LLM_RETRIES = Counter("llm_call_retries_total", "LLM calls retried by the gateway", ["model", "error"])
+LLM_THROTTLE_SECONDS = Counter("llm_throttle_seconds_total", "Time LLM calls waited for the gateway rate limiter", ["model"])
+
+TOOL_LATENCY = Histogram("tool_call_latency_seconds", "Latency of SOP tool calls", ["tool"], buckets=LATENCY_BUCKETS)
+TOOL_ERRORS = Counter("tool_call_errors_total", "Failed SOP tool calls", ["tool"])
+TOOL_IN_FLIGHT = Gauge("tool_calls_in_flight", "SOP tool calls currently running", ["tool"])
+
+ROUTER_DECISIONS = Counter("router_decisions_total", "Routing decisions by source (local, llm_fallback), shadow counts local decisions also sent to the LLM router", ["task", "source"])
+ROUTER_AGREEMENT = Counter("router_agreement_total", "Local vs LLM router agreement when both answered", ["task", "agreed"])
+
+COALESCED_REQUESTS = Counter(
+    "coalesced_requests_total", "Requests by single-flight role, coalescing ratio = follower / (leader + follower)",
+    ["endpoint", "role"]
+)
+
+EXECUTOR_STATS = Gauge("graph_executor_stat", "Bounded graph executor counters", ["executor", "stat"])
+
+# Loop and LLM call counters of the graph run the current thread/task belongs to
+_request_loops = contextvars.ContextVar("request_loops", default=None)
+# Counters of one run are bumped from several threads (concurrent graders, callbacks)
+_request_counters_lock = threading.Lock()
+
+
+def _increment(counters: dict, key: str):
+    with _request_counters_lock:
+        counters[key] += 1
+
+
+@contextmanager
+def track_graph_request(graph_name: str):
+    """Record latency, errors, in-flight and loop iterations of one graph run. Nested calls are ignored."""
+    if _request_loops.get() is not None:
+        yield
+        return
+
+    counters = {"loops": 0, "llm_calls": 0, "started": time.monotonic()}
+    token = _request_loops.set(counters)
+    REQUESTS_IN_FLIGHT.labels(graph_name).inc()
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        REQUEST_ERRORS.labels(graph_name).inc()
+        raise
+    finally:
+        REQUEST_LATENCY.labels(graph_name).observe(time.perf_counter() - started)
+        REQUEST_LOOPS.labels(graph_name).observe(counters["loops"])
+        REQUESTS_IN_FLIGHT.labels(graph_name).dec()
+        try:
+            _request_loops.reset(token)
+        except ValueError:
+            # Generator closed from another context
+            _request_loops.set(None)
+
+
+def current_request_usage():
+    """
+    Loop iterations, LLM calls and monotonic start time of the graph run the caller
+    belongs to, None outside a tracked run.
+    """
+    return _request_loops.get()
+
+
+def instrument_node(graph_name: str, node_name: str, func, counts_loop: bool = False):
+    """
+    Wrap a graph node (or routing function) with latency, error and in-flight metrics.
+    counts_loop marks nodes whose every run is one more loop iteration of the request.
+    """
+    labels = (graph_name, node_name)
+
+    def before():
+        NODE_IN_FLIGHT.labels(*labels).inc()
+        loops = _request_loops.get()
+        if counts_loop and loops is not None:
+            _increment(loops, "loops")
+        return time.perf_counter()
+
+    def after(started):
+        NODE_LATENCY.labels(*labels).observe(time.perf_counter() - started)
+        NODE_IN_FLIGHT.labels(*labels).dec()
+
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            started = before()
+            try:
+                return await func(*args, **kwargs)
+            except BaseException:
+                NODE_ERRORS.labels(*labels).inc()
+                raise
+            finally:
+                after(started)
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = before()
+        try:
+            return func(*args, **kwargs)
+        except BaseException:
+            NODE_ERRORS.labels(*labels).inc()
+            raise
+        finally:
+            after(started)
+    return wrapper
+
+
+class LLMToolMetricsHandler(BaseCallbackHandler):
+    """Callback handler timing every LLM and tool call made inside the graphs."""
+
+    def __init__(self):
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, label):
+        with self._lock:
+            self._started[run_id] = (label, time.perf_counter())
+
+    def _finish(self, run_id):
+        with self._lock:
+            return self._started.pop(run_id, (None, None))
+
+    @staticmethod
+    def _model_name(serialized, metadata):
+        metadata = metadata or {}
+        kwargs = (serialized or {}).get("kwargs", {})
+        return metadata.get("ls_model_name") or kwargs.get("model_name") or kwargs.get("model") or "unknown"
+
+    @staticmethod
+    def _count_llm_call():
+        usage = _request_loops.get()
+        if usage is not None:
+            _increment(usage, "llm_calls")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._count_llm_call()
+        model = self._model_name(serialized, metadata)
+        LLM_IN_FLIGHT.labels(model).inc()
+        self._start(run_id, model)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._count_llm_call()
+        model = self._model_name(serialized, metadata)
+        LLM_IN_FLIGHT.labels(model).inc()
+        self._start(run_id, model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        model, started = self._finish(run_id)
+        if model is None:
+            return
+        LLM_LATENCY.labels(model).observe(time.perf_counter() - started)
+        LLM_IN_FLIGHT.labels(model).dec()
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        for kind in ("prompt_tokens", "completion_tokens"):
+            if usage.get(kind):
+                LLM_TOKENS.labels(model, kind.split("_")[0]).inc(usage[kind])
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        model, started = self._finish(run_id)
+        if model is None:
+            return
+        LLM_ERRORS.labels(model).inc()
+        LLM_LATENCY.labels(model).observe(time.perf_counter() - started)
+        LLM_IN_FLIGHT.labels(model).dec()
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        tool = (serialized or {}).get("name") or "unknown"
+        TOOL_IN_FLIGHT.labels(tool).inc()
+        self._start(run_id, tool)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        tool, started = self._finish(run_id)
+        if tool is None:
+            return
+        TOOL_LATENCY.labels(tool).observe(time.perf_counter() - started)
+        TOOL_IN_FLIGHT.labels(tool).dec()
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        tool, started = self._finish(run_id)
+        if tool is None:
+            return
+        TOOL_ERRORS.labels(tool).inc()
+        TOOL_LATENCY.labels(tool).observe(time.perf_counter() - started)
+        TOOL_IN_FLIGHT.labels(tool).dec()
+
+
+llm_tool_metrics_handler = LLMToolMetricsHandler()
+
+
+def instrument_graph(graph, graph_name: str):
+    """
+    Attach the LLM/tool callback handler to a compiled graph and track every
+    invoke/stream (sync and async) as one graph request.
+    """
+    graph = graph.with_config(callbacks=[llm_tool_metrics_handler])
+    stream, astream = graph.stream, graph.astream
+
+    def tracked_stream(*args, **kwargs):
+        with track_graph_request(graph_name):
+            yield from stream(*args, **kwargs)
+
+    async def tracked_astream(*args, **kwargs):
+        with track_graph_request(graph_name):
+            async for chunk in astream(*args, **kwargs):
+                yield chunk
+
+    # invoke/ainvoke are implemented on top of stream/astream
+    graph.stream = tracked_stream
+    graph.astream = tracked_astream
+    return graph
+
+
+def record_executor_stats(executor_stats: dict):
+    """Publish the bounded executor counters as gauges before a scrape."""
+    for executor, stats in executor_stats.items():
+        for stat, value in stats.items():
+            EXECUTOR_STATS.labels(executor, stat).set(value)
+
+
+def render_metrics():
+    """Prometheus text exposition of all metrics, returns (body, content_type)."""
+    return generate_latest(), CONTENT_TYPE_LATEST
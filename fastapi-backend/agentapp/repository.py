@@ -0,0 +1,205 @@
+import os
+import json
+import sqlite3
+import threading
+from bisect import bisect_right
+from typing import Optional
+
+from agentapp import seed_data
+
+# memory (default) or sqlite
+DATA_BACKEND = os.getenv("DATA_BACKEND", "memory").lower()
+# sqlite file of the sqlite backend, relative paths resolve against the fastapi-backend dir
+DATA_SQLITE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    os.getenv("DATA_SQLITE_PATH", "data/app_data.sqlite")
+)
+
+# Table name -> indexed fields, every lookup and filter goes through one of them
+TABLE_INDEXES = {
+    "issues": ("threadID", "userID", "issueTitle"),
+    "payments": ("userID", "policyNumber", "paymentStatus"),
+    "transaction_documents": ("userID", "transactionID", "documentID", "transactionStatus"),
+}
+
+
+class Page:
+    """One page of rows and the cursor of the next page (None on the last page)."""
+
+    def __init__(self, rows: list, next_cursor):
+        self.rows = rows
+        self.next_cursor = next_cursor
+
+
+def parse_cursor(cursor) -> int:
+    """Cursors are the row id of the last row of the previous page."""
+    if cursor in (None, ""):
+        return 0
+    try:
+        return int(cursor)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+class MemoryTable:
+    """
+    Rows kept in insertion order with a hash index per indexed field
+    (value -> ascending row ids), so lookups are O(1) and filtered pages
+    are a bisect into the smallest matching index.
+    """
+
+    def __init__(self, name: str, indexed_fields):
+        self.name = name
+        self.indexed_fields = tuple(indexed_fields)
+        self.version = 0
+        self._rows = {}
+        self._row_ids = []
+        self._indexes = {field: {} for field in self.indexed_fields}
+        self._next_row_id = 1
+        self._lock = threading.Lock()
+
+    def count(self) -> int:
+        return len(self._row_ids)
+
+    def insert_many(self, rows):
+        with self._lock:
+            for row in rows:
+                row_id = self._next_row_id
+                self._next_row_id += 1
+                self._rows[row_id] = dict(row)
+                self._row_ids.append(row_id)
+                for field in self.indexed_fields:
+                    if row.get(field) is not None:
+                        self._indexes[field].setdefault(row[field], []).append(row_id)
+            self.version += 1
+
+    def get(self, field: str, value):
+        """First row whose field equals value, None if there is none."""
+        row_ids = self._indexes[field].get(value)
+        return self._rows[row_ids[0]] if row_ids else None
+
+    def page(self, filters: dict = None, cursor=None, limit: Optional[int] = 100) -> Page:
+        """Rows matching all (indexed field -> value) filters, in insertion order, after the cursor. limit None returns them all."""
+        filters = {field: value for field, value in (filters or {}).items() if value is not None}
+        after = parse_cursor(cursor)
+
+        if filters:
+            candidates = min((self._indexes[field].get(value, []) for field, value in filters.items()), key=len)
+        else:
+            candidates = self._row_ids
+
+        rows, last_row_id = [], None
+        for row_id in candidates[bisect_right(candidates, after):]:
+            row = self._rows[row_id]
+            if all(row.get(field) == value for field, value in filters.items()):
+                if limit is not None and len(rows) == limit:
+                    return Page(rows, str(last_row_id))
+                rows.append(row)
+                last_row_id = row_id
+        return Page(rows, None)
+
+
+class SqliteTable:
+    """
+    The same interface backed by a sqlite table: rows stored as JSON with the
+    indexed fields as indexed columns, pages keyed on the rowid.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, lock: threading.Lock, name: str, indexed_fields):
+        self.name = name
+        self.indexed_fields = tuple(indexed_fields)
+        self._db = connection
+        self._lock = lock
+        self._writes = 0
+
+        columns = ", ".join(f'"{field}" TEXT' for field in self.indexed_fields)
+        with self._lock:
+            self._db.execute(f'CREATE TABLE IF NOT EXISTS "{name}" (row_id INTEGER PRIMARY KEY AUTOINCREMENT, {columns}, data TEXT NOT NULL)')
+            for field in self.indexed_fields:
+                self._db.execute(f'CREATE INDEX IF NOT EXISTS "{name}_{field}" ON "{name}" ("{field}", row_id)')
+            self._db.commit()
+
+    @property
+    def version(self):
+        """Changes through this connection and, through data_version, by other connections."""
+        with self._lock:
+            return (self._writes, self._db.execute("PRAGMA data_version").fetchone()[0])
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute(f'SELECT COUNT(*) FROM "{self.name}"').fetchone()[0]
+
+    def insert_many(self, rows):
+        fields = ", ".join(f'"{field}"' for field in self.indexed_fields)
+        placeholders = ", ".join("?" for _ in range(len(self.indexed_fields) + 1))
+        values = [
+            tuple(None if row.get(field) is None else str(row[field]) for field in self.indexed_fields) + (json.dumps(row),)
+            for row in rows
+        ]
+        with self._lock:
+            self._db.executemany(f'INSERT INTO "{self.name}" ({fields}, data) VALUES ({placeholders})', values)
+            self._db.commit()
+            self._writes += 1
+
+    def get(self, field: str, value):
+        if field not in self.indexed_fields:
+            raise KeyError(field)
+        with self._lock:
+            row = self._db.execute(
+                f'SELECT data FROM "{self.name}" WHERE "{field}" = ? ORDER BY row_id LIMIT 1', (str(value),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def page(self, filters: dict = None, cursor=None, limit: Optional[int] = 100) -> Page:
+        filters = {field: value for field, value in (filters or {}).items() if value is not None}
+        for field in filters:
+            if field not in self.indexed_fields:
+                raise KeyError(field)
+
+        where = " AND ".join(["row_id > ?"] + [f'"{field}" = ?' for field in filters])
+        params = [parse_cursor(cursor)] + [str(value) for value in filters.values()]
+        query = f'SELECT row_id, data FROM "{self.name}" WHERE {where} ORDER BY row_id'
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit + 1)
+        with self._lock:
+            fetched = self._db.execute(query, params).fetchall()
+
+        rows = [json.loads(data) for _, data in fetched[:limit]]
+        next_cursor = str(fetched[limit - 1][0]) if limit is not None and len(fetched) > limit else None
+        return Page(rows, next_cursor)
+
+
+class Repository:
+    """
+    Issues, payment statuses and transaction documents behind indexed tables.
+    Empty tables are seeded from agentapp.seed_data.
+    """
+
+    def __init__(self, backend: str = DATA_BACKEND, sqlite_path: str = DATA_SQLITE_PATH):
+        self.backend = backend
+        if backend == "sqlite":
+            os.makedirs(os.path.dirname(sqlite_path), exist_ok=True)
+            connection = sqlite3.connect(sqlite_path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            lock = threading.Lock()
+            tables = {name: SqliteTable(connection, lock, name, fields) for name, fields in TABLE_INDEXES.items()}
+        elif backend == "memory":
+            tables = {name: MemoryTable(name, fields) for name, fields in TABLE_INDEXES.items()}
+        else:
+            raise ValueError(f"Unknown DATA_BACKEND: {backend}")
+
+        self.issues = tables["issues"]
+        self.payments = tables["payments"]
+        self.transaction_documents = tables["transaction_documents"]
+
+        for table, rows in (
+            (self.issues, seed_data.issues_data),
+            (self.payments, seed_data.payment_status_data),
+            (self.transaction_documents, seed_data.transaction_documents),
+        ):
+            if table.count() == 0:
+                table.insert_many(rows)
+
+
+repository = Repository()
@@ -0,0 +1,114 @@
+import os
+import time
+import threading
+
+# Warm up heavy resources in the background when the API starts
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+# Resources loaded by the warm-up task, /readyz reports ready once all of them are loaded
+WARMUP_RESOURCES = [
+    name.strip() for name in
+    os.getenv("WARMUP_RESOURCES", "embeddings,faq_vectorstore,issue_sop_vectorstore,faq_retriever,issue_sop_retriever,local_router,yolo,clip").split(",")
+    if name.strip()
+]
+# Failed resources are retried in the background this often, 0 disables the retries
+RESOURCE_RETRY_SECONDS = float(os.getenv("RESOURCE_RETRY_SECONDS", "30"))
+
+
+class LazyResource:
+    """
+    A heavy resource (model weights, vector store client) created on first use.
+    A failed load is retried on the next get.
+
+    loaded is an optional probe of the underlying loader for resources that can
+    also be loaded outside the registry, such a resource is reported ready as
+    soon as the probe says it is loaded.
+    """
+
+    def __init__(self, name: str, factory, loaded=None):
+        self.name = name
+        self.factory = factory
+        self.loaded = loaded
+        self.state = "pending"
+        self.error = None
+        self.load_seconds = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self.state == "ready":
+            return self._value
+        with self._lock:
+            if self.state == "ready":
+                return self._value
+
+            print(f"[INFO] loading resource {self.name}...")
+            self.state = "loading"
+            started = time.perf_counter()
+            try:
+                self._value = self.factory()
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                raise
+            self.load_seconds = round(time.perf_counter() - started, 3)
+            self.state = "ready"
+            self.error = None
+            print(f"[INFO] resource {self.name} ready in {self.load_seconds}s")
+            return self._value
+
+    def refresh(self):
+        """Adopt a resource the underlying loader already loaded, the factory then returns it at once."""
+        if self.state in ("ready", "loading") or self.loaded is None:
+            return
+        try:
+            if self.loaded():
+                self.get()
+        except Exception as e:
+            print(f"[ERROR] refreshing resource {self.name} failed: {e}")
+
+    def status(self) -> dict:
+        self.refresh()
+        return {"state": self.state, "load_seconds": self.load_seconds, "error": self.error}
+
+
+class ResourceRegistry:
+    """Named lazy resources with warm-up and readiness reporting."""
+
+    def __init__(self):
+        self._resources = {}
+
+    def register(self, name: str, factory, loaded=None) -> LazyResource:
+        if name not in self._resources:
+            self._resources[name] = LazyResource(name, factory, loaded)
+        return self._resources[name]
+
+    def get(self, name: str):
+        return self._resources[name].get()
+
+    def warm_up(self, names=None):
+        """Load the given (default all) resources, logging failures instead of raising."""
+        for name in names or list(self._resources):
+            if name not in self._resources:
+                print(f"[WARN] warm-up skipped unknown resource {name}")
+                continue
+            try:
+                self._resources[name].get()
+            except Exception as e:
+                print(f"[ERROR] warm-up of {name} failed: {e}")
+
+    def failed(self, names=None) -> list:
+        names = names or list(self._resources)
+        return [name for name in names if name in self._resources and self._resources[name].state == "failed"]
+
+    def is_ready(self, names=None) -> bool:
+        names = names or list(self._resources)
+        for name in names:
+            if name in self._resources:
+                self._resources[name].refresh()
+        return all(name in self._resources and self._resources[name].state == "ready" for name in names)
+
+    def status(self) -> dict:
+        return {name: resource.status() for name, resource in self._resources.items()}
+
+
+resource_registry = ResourceRegistry()
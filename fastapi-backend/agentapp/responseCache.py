@@ -0,0 +1,72 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class SerializedResponse:
+    """Serialized body of a response with its strong ETag, gzipped on first request."""
+
+    def __init__(self, body: bytes, headers: dict = None):
+        self.body = body
+        self.headers = headers or {}
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self._gzipped = None
+
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzipped
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check, weak comparison as RFC 9110 requires for it."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class SerializedResponseCache:
+    """
+    LRU of serialized responses keyed on the request parameters. An entry is only
+    served while the data version it was built from is current, so bodies are
+    rebuilt only after the underlying data changed.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version, build) -> SerializedResponse:
+        """Cached response of key at version, else build() -> SerializedResponse is cached and returned."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        response = build()
+        with self._lock:
+            self._entries[key] = (version, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return response
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            }
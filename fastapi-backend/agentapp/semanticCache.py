@@ -0,0 +1,143 @@
+import os
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Per-collection generation counters live next to the Chroma data so the
+# ingestion scripts (separate processes) can invalidate the serving cache.
+GENERATIONS_FILE = "collection_generations.json"
+
+
+def read_collection_generations(persist_directory: str) -> dict:
+    """Read the per-collection generation counters, {} if nothing was ingested yet."""
+    path = os.path.join(persist_directory, GENERATIONS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def bump_collection_generation(persist_directory: str, collection_name: str) -> int:
+    """Increment the generation of a collection after it was re-ingested."""
+    generations = read_collection_generations(persist_directory)
+    generations[collection_name] = generations.get(collection_name, 0) + 1
+
+    path = os.path.join(persist_directory, GENERATIONS_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(generations, f)
+    os.replace(tmp_path, path)
+
+    print(f"[INFO] {collection_name} generation bumped to {generations[collection_name]}")
+    return generations[collection_name]
+
+
+class SemanticAnswerCache:
+    """
+    Cache of final graph responses keyed on the question embedding.
+
+    A lookup hits when a cached question is at least `threshold` cosine similar,
+    mentions the same numbers (policy numbers, IDs) and was answered from a
+    collection whose generation did not change since. Entries expire after
+    `ttl_seconds` and the least recently used ones are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, embedding_model, persist_directory: str, threshold: float = 0.92,
+                 ttl_seconds: float = 3600, max_entries: int = 1024):
+        self.embedding_model = embedding_model
+        self.persist_directory = persist_directory
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._generations_mtime = None
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def embed(self, question: str):
+        """Normalized embedding of the question."""
+        embedding = np.asarray(self.embedding_model.embed_query(question), dtype=np.float32)
+        return embedding / (np.linalg.norm(embedding) or 1.0)
+
+    def collection_generations(self) -> dict:
+        """Current generation counters, re-reading the counters file only when it changed."""
+        path = os.path.join(self.persist_directory, GENERATIONS_FILE)
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        if mtime != self._generations_mtime:
+            self._generations = read_collection_generations(self.persist_directory)
+            self._generations_mtime = mtime
+        return self._generations
+
+    @staticmethod
+    def numbers_in(question: str) -> frozenset:
+        return frozenset(re.findall(r"\d+", question))
+
+    def lookup(self, question: str, embedding=None):
+        """
+        Return the cached response for a semantically equivalent question, or None.
+        """
+        if not self.enabled:
+            return None
+
+        embedding = self.embed(question) if embedding is None else embedding
+        numbers = self.numbers_in(question)
+        now = time.time()
+
+        with self._lock:
+            generations = self.collection_generations()
+            best_key, best_score = None, self.threshold
+            for key, entry in list(self._entries.items()):
+                if now - entry["created_at"] > self.ttl_seconds or \
+                        entry["generation"] != generations.get(entry["collection"], 0):
+                    del self._entries[key]
+                    continue
+                if entry["numbers"] != numbers:
+                    continue
+                score = float(np.dot(entry["embedding"], embedding))
+                if score >= best_score:
+                    best_key, best_score = key, score
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(best_key)
+            print(f"semantic cache hit ({best_score:.3f}) for question: {question}")
+            return self._entries[best_key]["response"]
+
+    def store(self, question: str, response: dict, collection_name: str, embedding=None):
+        """Cache a graded final response answered from collection_name."""
+        if not self.enabled:
+            return
+
+        embedding = self.embed(question) if embedding is None else embedding
+        with self._lock:
+            generation = self.collection_generations().get(collection_name, 0)
+            self._entries[question] = {
+                "embedding": embedding,
+                "numbers": self.numbers_in(question),
+                "collection": collection_name,
+                "generation": generation,
+                "created_at": time.time(),
+                "response": response,
+            }
+            self._entries.move_to_end(question)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,67 @@
+import re
+import asyncio
+import threading
+
+from agentapp.metrics import COALESCED_REQUESTS
+
+
+def normalize_question(question: str) -> str:
+    """Coalescing key of a question: case, whitespace and trailing punctuation do not matter."""
+    return re.sub(r"\s+", " ", str(question or "").lower()).strip().rstrip("?!. ")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller (leader) starts the work as a task, callers arriving while it
+    is in flight (followers) await the same task and share its result or exception.
+    The key is released as soon as the work finishes, so later calls run again.
+    A disconnecting caller never cancels the shared work.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: str, work):
+        """
+        Run work() (a coroutine function) once per in-flight key.
+
+        Returns:
+            (result, shared): shared is True if the result came from another caller's execution
+        """
+        with self._lock:
+            task = self._in_flight.get(key)
+            shared = task is not None
+            if shared:
+                self.followers += 1
+            else:
+                self.leaders += 1
+                task = asyncio.ensure_future(work())
+                self._in_flight[key] = task
+                task.add_done_callback(lambda _: self._release(key, task))
+
+        COALESCED_REQUESTS.labels(self.name, "follower" if shared else "leader").inc()
+        return await asyncio.shield(task), shared
+
+    def _release(self, key, task):
+        with self._lock:
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+        # Mark the exception retrieved in case every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.leaders + self.followers
+            return {
+                "in_flight": len(self._in_flight),
+                "executions": self.leaders,
+                "coalesced": self.followers,
+                "coalescing_ratio": round(self.followers / total, 3) if total else 0.0,
+            }
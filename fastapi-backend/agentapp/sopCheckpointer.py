@@ -0,0 +1,196 @@
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+# Checkpointer backend of the SOP graph: "sqlite" (default) or "memory"
+SOP_CHECKPOINTER = os.getenv("SOP_CHECKPOINTER", "sqlite")
+SOP_CHECKPOINT_PATH = os.getenv(
+    "SOP_CHECKPOINT_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "checkpoints", "sop_checkpoints.sqlite")
+)
+# Threads idle for longer than this are evicted
+SOP_CHECKPOINT_TTL_SECONDS = float(os.getenv("SOP_CHECKPOINT_TTL_SECONDS", "86400"))
+# Least recently used threads are evicted beyond these ceilings
+SOP_CHECKPOINT_MAX_THREADS = int(os.getenv("SOP_CHECKPOINT_MAX_THREADS", "10000"))
+SOP_CHECKPOINT_MAX_BYTES = int(os.getenv("SOP_CHECKPOINT_MAX_BYTES", str(256 * 1024 * 1024)))
+# Eviction runs at most once per interval, on writes
+SOP_CHECKPOINT_EVICT_INTERVAL_SECONDS = float(os.getenv("SOP_CHECKPOINT_EVICT_INTERVAL_SECONDS", "30"))
+
+
+def thread_id_of(config) -> str:
+    return config["configurable"]["thread_id"]
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """
+    In-process checkpointer that evicts idle threads after ttl_seconds and the
+    least recently used threads beyond max_threads.
+    State does not survive a restart and is not shared between workers.
+    """
+
+    def __init__(self, ttl_seconds: float = SOP_CHECKPOINT_TTL_SECONDS, max_threads: int = SOP_CHECKPOINT_MAX_THREADS):
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self.max_threads = max_threads
+        self._activity = OrderedDict()
+        self._activity_lock = threading.Lock()
+
+    def _touch(self, config):
+        with self._activity_lock:
+            self._activity[thread_id_of(config)] = time.time()
+            self._activity.move_to_end(thread_id_of(config))
+
+    def get_tuple(self, config):
+        checkpoint_tuple = super().get_tuple(config)
+        if checkpoint_tuple is not None:
+            self._touch(config)
+        return checkpoint_tuple
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        self._touch(config)
+        self.evict()
+        return next_config
+
+    def evict(self):
+        """Drop idle threads and the least recently used ones beyond max_threads."""
+        now = time.time()
+        with self._activity_lock:
+            evicted = [thread_id for thread_id, last_access in self._activity.items() if now - last_access > self.ttl_seconds]
+            overflow = len(self._activity) - len(evicted) - self.max_threads
+            if overflow > 0:
+                active = [thread_id for thread_id in self._activity if thread_id not in evicted]
+                evicted.extend(active[:overflow])
+            for thread_id in evicted:
+                del self._activity[thread_id]
+
+        for thread_id in evicted:
+            self.delete_thread(thread_id)
+        if evicted:
+            print(f"[INFO] evicted {len(evicted)} SOP threads from memory checkpointer")
+        return evicted
+
+
+def build_sqlite_saver(path: str = SOP_CHECKPOINT_PATH, ttl_seconds: float = SOP_CHECKPOINT_TTL_SECONDS,
+                       max_threads: int = SOP_CHECKPOINT_MAX_THREADS, max_bytes: int = SOP_CHECKPOINT_MAX_BYTES,
+                       evict_interval: float = SOP_CHECKPOINT_EVICT_INTERVAL_SECONDS):
+    """
+    SQLite checkpointer that survives restarts and can be shared by several
+    uvicorn workers, with TTL/LRU eviction of idle threads and a size ceiling.
+    """
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    class EvictingSqliteSaver(SqliteSaver):
+        _last_evicted_at = 0.0
+
+        def setup(self):
+            if self.is_setup:
+                return
+            super().setup()
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS thread_activity (thread_id TEXT PRIMARY KEY, last_access REAL NOT NULL)"
+            )
+            self.conn.commit()
+
+        def _touch(self, config):
+            with self.cursor() as cur:
+                cur.execute(
+                    "INSERT OR REPLACE INTO thread_activity (thread_id, last_access) VALUES (?, ?)",
+                    (thread_id_of(config), time.time())
+                )
+
+        def get_tuple(self, config):
+            checkpoint_tuple = super().get_tuple(config)
+            if checkpoint_tuple is not None:
+                self._touch(config)
+            return checkpoint_tuple
+
+        def put(self, config, checkpoint, metadata, new_versions):
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+            self._touch(config)
+            if time.time() - self._last_evicted_at >= evict_interval:
+                self.evict()
+            return next_config
+
+        # SqliteSaver has no async API, run the sync methods on a thread so the SOP
+        # graph can be driven with ainvoke without blocking the event loop
+        async def aget_tuple(self, config):
+            return await asyncio.to_thread(self.get_tuple, config)
+
+        async def alist(self, config, *, filter=None, before=None, limit=None):
+            checkpoint_tuples = await asyncio.to_thread(
+                lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+            )
+            for checkpoint_tuple in checkpoint_tuples:
+                yield checkpoint_tuple
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+        async def aput_writes(self, config, writes, task_id, task_path=""):
+            return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+        async def adelete_thread(self, thread_id):
+            return await asyncio.to_thread(self.delete_thread, thread_id)
+
+        def used_bytes(self) -> int:
+            with self.cursor(transaction=False) as cur:
+                page_count = cur.execute("PRAGMA page_count").fetchone()[0]
+                freelist_count = cur.execute("PRAGMA freelist_count").fetchone()[0]
+                page_size = cur.execute("PRAGMA page_size").fetchone()[0]
+            return (page_count - freelist_count) * page_size
+
+        def evict(self):
+            """Drop idle threads, then least recently used threads beyond max_threads and max_bytes."""
+            self._last_evicted_at = time.time()
+            with self.cursor(transaction=False) as cur:
+                evicted = [row[0] for row in cur.execute(
+                    "SELECT thread_id FROM thread_activity WHERE last_access < ?",
+                    (self._last_evicted_at - ttl_seconds,)
+                ).fetchall()]
+                lru = [row[0] for row in cur.execute(
+                    "SELECT thread_id FROM thread_activity WHERE last_access >= ? ORDER BY last_access",
+                    (self._last_evicted_at - ttl_seconds,)
+                ).fetchall()]
+
+            overflow = len(lru) - max_threads
+            if overflow > 0:
+                evicted.extend(lru[:overflow])
+                lru = lru[overflow:]
+            self._delete_threads(evicted)
+
+            # Keep dropping the oldest threads while the store is above its ceiling
+            while lru and self.used_bytes() > max_bytes:
+                batch, lru = lru[:max(1, len(lru) // 10)], lru[max(1, len(lru) // 10):]
+                self._delete_threads(batch)
+                evicted.extend(batch)
+
+            if evicted:
+                print(f"[INFO] evicted {len(evicted)} SOP threads from sqlite checkpointer")
+            return evicted
+
+        def _delete_threads(self, thread_ids):
+            for thread_id in thread_ids:
+                self.delete_thread(thread_id)
+                with self.cursor() as cur:
+                    cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (thread_id,))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    # WAL lets several worker processes read while one writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    return EvictingSqliteSaver(conn)
+
+
+def build_sop_checkpointer(backend: str = SOP_CHECKPOINTER):
+    """Build the checkpointer selected through SOP_CHECKPOINTER."""
+    if backend == "memory":
+        return BoundedMemorySaver()
+    if backend == "sqlite":
+        return build_sqlite_saver()
+    raise ValueError(f"Unknown SOP_CHECKPOINTER backend: {backend}")
@@ -13,16 +13,22 @@ from langgraph.prebuilt import tools_condition, ToolNode
 
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 from langchain_core.prompts import PromptTemplate
-from langchain_groq import ChatGroq
+from agentapp.llmGateway import get_chat_model
 from langchain_core.agents import AgentAction
 from typing import Dict, List, Optional, Any
 
 import uuid
+import asyncio
+import contextvars
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 
-from damageEvaluator.image_analyzer import analyze_image
-from damageEvaluator.verify_accident_clip import verify_claim_clip
+from agentapp.sopCheckpointer import build_sop_checkpointer
+from agentapp.metrics import instrument_node, instrument_graph
+from agentapp.resourceRegistry import resource_registry
+from agentapp.messageHistory import compact_history, approx_tokens
 
 # Load environment variables from the .env file in the same directory as this script
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
@@ -36,16 +42,17 @@ else:
     raise ValueError("GROQ_API_KEY environment variable is not set")
 
 
-llm = ChatGroq(model="qwen/qwen3-32b", temperature=0)
+llm = get_chat_model("qwen/qwen3-32b", temperature=0)
 
-# Agent prompt template
+# Agent prompt, rendered once with the tools into a static system message so the
+# prompt prefix stays byte-stable across steps and threads (provider-side prompt caching)
 agent_prompt = PromptTemplate.from_template("""
 You are an intelligent assistant that follows a given Standard Operating Procedure (SOP) to decide and execute tools step by step.
 
 Your goals:
 1. Always follow the provided SOP exactly — do not assume, infer, or hallucinate any extra steps or tools.
 2. Use only the tools listed below. Do not call any tool that is not in the SOP.
-3. If this is the first execution (previous tool response is null), start from the first relevant step in the SOP.
+3. If this is the first execution (no tool messages yet), start from the first relevant step in the SOP.
 4. If the SOP step depends on the previous tool’s result, decide the next tool accordingly.
 5. If the SOP mention to STOP or END then dont initiate or call another tools.
 5. Always interrupt before executing a tool to ask for user approval.
@@ -53,8 +60,6 @@ Your goals:
 ---
 
 **Format to follow strictly:**
-SOP: {operating_procedure}
-
 Thought: Explain what step in the SOP should be executed next, and why.
 Action: Choose one action (tool) to execute next — must be one of [{tool_names}].
 
@@ -63,11 +68,6 @@ Action: Choose one action (tool) to execute next — must be one of [{tool_names
 **Available tools:**
 {tools}
 
-userID: {userID}
-imageURL: {imageURL}
-issueDescription: {description}                                      
-previous tool response: {toolRes}                                            
-
 ---
 
 Important:
@@ -77,7 +77,16 @@ Important:
 - Dont call unwated tools or twise a tool unless its not explictily specified in the SOP.
 - Decide whether to call a tool only if it’s required by the SOP and appropriate based on the last tool’s response.
 - Also wait some time to comple the tool exection and get the response.
-- REMEMBER AND VERY IMPORTANT: Also please dont call any tools those are not specified in the SOP, only execute the tools based on the given SOP: {operating_procedure}. exit after all tool exections completed
+- REMEMBER AND VERY IMPORTANT: Also please dont call any tools those are not specified in the SOP, only execute the tools based on the given SOP. exit after all tool exections completed
+""")
+
+# Per thread task, constant for the whole thread, the tool responses follow as tool messages
+task_prompt = PromptTemplate.from_template("""
+SOP: {operating_procedure}
+
+userID: {userID}
+imageURL: {imageURL}
+issueDescription: {description}
 """)
 
 
@@ -96,7 +105,24 @@ else:
     raise ValueError("GROQ_API_KEY environment variable is not set")
 
 
-llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0)
+llm = get_chat_model("llama-3.3-70b-versatile", temperature=0)
+
+
+# Vision models (and torch/ultralytics/transformers) are imported only when first needed
+def load_yolo_model():
+    from damageEvaluator.image_analyzer import get_yolo_model
+    return get_yolo_model()
+
+def load_clip_scorer():
+    from damageEvaluator.verify_accident_clip import get_clip_scorer
+    return get_clip_scorer()
+
+resource_registry.register("yolo", load_yolo_model)
+resource_registry.register("clip", load_clip_scorer)
+
+# Threads running the CPU bound vision tools (YOLO, CLIP) when the SOP graph runs async
+SOP_MODEL_WORKERS = int(os.getenv("SOP_MODEL_WORKERS", "2"))
+model_pool = ThreadPoolExecutor(max_workers=SOP_MODEL_WORKERS, thread_name_prefix="sop-model")
 
 
 # In-memory payment data
@@ -106,14 +132,7 @@ payment_data = {
     "U003": {"status": "pending", "amount": "₹7500", "date": "2024-01-16", "name": "Bob Wilson"}
 }
 
-@tool
-def get_payment_status(user_id: str) -> dict:
-    """Get payment status from API for a user ID."""
-    import time
-    
-    # Simulate API processing time
-    time.sleep(1)
-    
+def payment_status_response(user_id: str) -> dict:
     # Access payment data directly (simulating API call)
     if user_id in payment_data:
         payment_info = payment_data[user_id]
@@ -133,7 +152,19 @@ def get_payment_status(user_id: str) -> dict:
             "message": f"User ID '{user_id}' not found."
         }
 
-@tool
+def get_payment_status(user_id: str) -> dict:
+    """Get payment status from API for a user ID."""
+    import time
+    
+    # Simulate API processing time
+    time.sleep(1)
+    return payment_status_response(user_id)
+
+async def aget_payment_status(user_id: str) -> dict:
+    # Simulated API call, awaited so other SOP runs keep going meanwhile
+    await asyncio.sleep(1)
+    return payment_status_response(user_id)
+
 def check_bank_statement(user_id: str) -> dict:
     """Get bank statement status for a user ID"""
     # return {
@@ -145,7 +176,6 @@ def check_bank_statement(user_id: str) -> dict:
         "status": "PENDING",
     }
 
-@tool
 def create_support_ticket(tool_input: str) -> dict:
     """Create support ticket for user issues. Input should be 'user_id,issue_description'"""
     parts = tool_input.split(',', 1)
@@ -160,7 +190,6 @@ def create_support_ticket(tool_input: str) -> dict:
         "priority": "high"
     }
 
-@tool
 def updateUserdetails(user_id: str) -> dict:
     """Update the user secondName for a user ID"""
     return {
@@ -169,7 +198,6 @@ def updateUserdetails(user_id: str) -> dict:
     }
 
 
-@tool
 def evaluateImageWithDescription(user_id: str, imageURL: str, description: str) -> dict:
     """evaluate the vehicle image with description to check the image and description are matching"""
 
@@ -191,6 +219,9 @@ def evaluateImageWithDescription(user_id: str, imageURL: str, description: str)
     else:
         image_path = imageURL
 
+    # Load the model through the registry so /readyz and the warm-up see it
+    resource_registry.get("clip")
+    from damageEvaluator.verify_accident_clip import verify_claim_clip
     result = verify_claim_clip(image_path, description)
     print(f"tool verify_claim_clip result: >>>>>>>>> ", result)
 
@@ -201,7 +232,6 @@ def evaluateImageWithDescription(user_id: str, imageURL: str, description: str)
     }
 
 
-@tool
 def estimateVehicleDamage(user_id: str, imageURL: str) -> dict:
     """Estimate vehicle damage for a user ID"""
     if not imageURL:
@@ -221,6 +251,9 @@ def estimateVehicleDamage(user_id: str, imageURL: str) -> dict:
 
     print(f"estimateVehicleDamage tool image_path >>>>>>> :", image_path)
 
+    # Load the model through the registry so /readyz and the warm-up see it
+    resource_registry.get("yolo")
+    from damageEvaluator.image_analyzer import analyze_image
     result = analyze_image(session_id="session_001", images=[image_path], description="car accident with another car")
 
     print(f"tool estimateVehicleDamage result: >>>>>>>>> ",result)
@@ -233,54 +266,79 @@ def estimateVehicleDamage(user_id: str, imageURL: str) -> dict:
     }
 
 
+async def run_on_model_pool(func, *args):
+    """Run a CPU bound vision tool on the model pool instead of the event loop."""
+    ctx = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(model_pool, partial(ctx.run, func, *args))
+
+async def acheck_bank_statement(user_id: str) -> dict:
+    return check_bank_statement(user_id)
+
+async def acreate_support_ticket(tool_input: str) -> dict:
+    return create_support_ticket(tool_input)
+
+async def aupdateUserdetails(user_id: str) -> dict:
+    return updateUserdetails(user_id)
+
+async def aevaluateImageWithDescription(user_id: str, imageURL: str, description: str) -> dict:
+    return await run_on_model_pool(evaluateImageWithDescription, user_id, imageURL, description)
+
+async def aestimateVehicleDamage(user_id: str, imageURL: str) -> dict:
+    return await run_on_model_pool(estimateVehicleDamage, user_id, imageURL)
+
+
+def sop_tool(func, coroutine):
+    """Tool with a sync and an async implementation, the graph uses the async one under ainvoke."""
+    return StructuredTool.from_function(func=func, coroutine=coroutine, name=func.__name__, description=func.__doc__)
+
+
 # Create LangChain Agent
 tools = [
-    get_payment_status,
-    create_support_ticket,
-    check_bank_statement,
-    updateUserdetails,
-    estimateVehicleDamage,
-    evaluateImageWithDescription
+    sop_tool(get_payment_status, aget_payment_status),
+    sop_tool(create_support_ticket, acreate_support_ticket),
+    sop_tool(check_bank_statement, acheck_bank_statement),
+    sop_tool(updateUserdetails, aupdateUserdetails),
+    sop_tool(estimateVehicleDamage, aestimateVehicleDamage),
+    sop_tool(evaluateImageWithDescription, aevaluateImageWithDescription)
 ]
 
 llm_with_tools = llm.bind_tools(tools)
 
-def assistant(state: GraphState):
+static_prompt = SystemMessage(content=agent_prompt.format(
+    tools="\n".join([f"{tool.name}: {tool.description}" for tool in tools]),
+    tool_names=", ".join([tool.name for tool in tools])
+))
+
+async def assistant(state: GraphState):
     """Plan what actions the agent wants to take"""
-    tool_descriptions = "\n".join([f"{tool.name}: {tool.description}" for tool in tools])
-    tool_names = ", ".join([tool.name for tool in tools])
-    
-    prompt_text = agent_prompt.format(
-        tools=tool_descriptions,
-        tool_names=tool_names,
+    task_message = HumanMessage(content=task_prompt.format(
         operating_procedure=state["operating_procedure"],
         userID= state["userID"],
         description = state.get("issueDescription", ""),
-        imageURL= state.get("imageURL", ""),
-        toolRes= state.get("toolRes", [])
-    )
+        imageURL= state.get("imageURL", "")
+    ))
 
-    print(f"prompt_text >>>>>> : {prompt_text}")
+    prefix = [static_prompt, task_message]
+    history = compact_history(state.get("messages") or [], prefix)
+    print(f"SOP assistant prompt: ~{approx_tokens(prefix + history)} tokens, {len(history)} history messages")
 
-    return {"messages": [llm_with_tools.invoke([prompt_text] + state.get("messages", []))]}
+    return {"messages": [await llm_with_tools.ainvoke(prefix + history)]}
 
 
 tools_node = ToolNode(tools)
 
-def handle_tool_output(state):
+async def handle_tool_output(state):
     # Run the ToolNode manually
-    tool_result = tools_node.invoke(state)
+    tool_result = await tools_node.ainvoke(state)
     
     # ✅ Extract the actual ToolMessage(s)
     tool_messages = tool_result.get("messages", [])
-    
-    messages = state.get("messages", [])
-    messages.extend(tool_messages)  # ✅ add ToolMessages, not a dict
 
+    # add_messages appends the ToolMessages to the history
     return {
-        **state,
-        "toolRes": tool_messages,  # optional, for prompt reference
-        "messages": messages
+        "toolRes": tool_messages,  # optional, for reference by the callers
+        "messages": tool_messages
     }
 
 
@@ -288,18 +346,18 @@ def build_sopGraph():
 
     #Graph
     workflow = StateGraph(GraphState)
-    workflow.add_node("assistant", assistant)
-    workflow.add_node("tools", handle_tool_output)
+    workflow.add_node("assistant", instrument_node("sop", "assistant", assistant))
+    workflow.add_node("tools", instrument_node("sop", "tools", handle_tool_output, counts_loop=True))
     workflow.add_edge(START, "assistant")
 
     workflow.add_conditional_edges("assistant", tools_condition)
     workflow.add_edge("tools", "assistant")
 
 
-    ## Human in the loop and memory
-    memory = MemorySaver()
+    ## Human in the loop and memory, bounded and persistent unless SOP_CHECKPOINTER=memory
+    memory = build_sop_checkpointer()
     graph = workflow.compile(interrupt_before=["tools"] ,checkpointer=memory)
-    return graph
+    return instrument_graph(graph, "sop")
 
     
     
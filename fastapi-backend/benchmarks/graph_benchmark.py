@@ -0,0 +1,227 @@
+"""
+Offline benchmark of the customer-service and SOP graphs.
+
+Every model is served by the deterministic fake backend of the LLM gateway with a
+configurable latency, so everything measured beyond the fake LLM time is framework
+overhead: state copies, prompt formatting, Chroma search, embeddings and tool execution.
+
+Run from the fastapi-backend dir:
+    python -m benchmarks.graph_benchmark --llm-latency-ms 0 --repeat 3
+"""
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import socket
+import asyncio
+import argparse
+import resource
+from collections import defaultdict
+
+# Offline: every route is decided by the fake LLM (not the MiniLM centroid router, which
+# could pick web_search), models come from the local cache and nothing phones home.
+# Set before agentapp is imported, its modules read them at import time.
+os.environ.setdefault("LOCAL_ROUTER", "false")
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+os.environ.setdefault("LANGCHAIN_TRACING_V2", "false")
+
+from agentapp.fakeLLM import fake_llm_stats
+from agentapp.llmGateway import llm_gateway
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# SOP replayed through the tool graph for every issue
+BENCHMARK_SOP = (
+    "If a payment status isn't reflected, first call get_payment_status to confirm the status. "
+    "If the status is not SUCCESS, check the bank statement. "
+    "If the bank statement also lacks the transaction, create a support ticket."
+)
+
+
+# Outbound connections attempted during the run, the benchmark fails if there are any
+network_attempts = []
+
+
+def forbid_network():
+    """Refuse every TCP connection and remember it, code that swallows the error still fails the run."""
+    connect, connect_ex = socket.socket.connect, socket.socket.connect_ex
+
+    def guard(original):
+        def guarded(sock, address, *args, **kwargs):
+            if sock.family in (socket.AF_INET, socket.AF_INET6):
+                network_attempts.append(address)
+                raise AssertionError(f"benchmark opened a network connection to {address}")
+            return original(sock, address, *args, **kwargs)
+        return guarded
+
+    socket.socket.connect = guard(connect)
+    socket.socket.connect_ex = guard(connect_ex)
+
+
+class FakeWebSearch:
+    """Deterministic stand-in for the Tavily search tool."""
+
+    def invoke(self, inputs):
+        return [{"content": f"Web result for: {inputs['query']}"}]
+
+
+def load_issues():
+    """The issues corpus the data repository is seeded with."""
+    from agentapp.seed_data import issues_data
+    return list(issues_data)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values), max(1, math.ceil(pct / 100 * len(values)))) - 1
+    return values[index]
+
+
+def timed_stream(graph, node_timings, *args, **kwargs):
+    """
+    Stream graph updates and attribute the time between consecutive updates
+    to the node that produced the update (nodes of one run execute sequentially).
+    """
+    last = time.perf_counter()
+    for chunk in graph.stream(*args, stream_mode="updates", **kwargs):
+        now = time.perf_counter()
+        for node in chunk:
+            node_timings[node].append(now - last)
+        last = now
+
+
+def run_customer_graph(graph, issues, node_timings, run_timings):
+    for issue in issues:
+        started = time.perf_counter()
+        timed_stream(graph, node_timings, {"question": issue["issueDescription"]}, config={"recursion_limit": 50})
+        run_timings.append(time.perf_counter() - started)
+
+
+async def atimed_stream(graph, node_timings, *args, **kwargs):
+    """timed_stream for graphs with async nodes."""
+    last = time.perf_counter()
+    async for chunk in graph.astream(*args, stream_mode="updates", **kwargs):
+        now = time.perf_counter()
+        for node in chunk:
+            node_timings[node].append(now - last)
+        last = now
+
+
+async def arun_sop_graph(graph, issues, node_timings, run_timings):
+    for issue in issues:
+        # Unique thread per run so repeats do not resume a finished thread
+        thread = {"configurable": {"thread_id": f"bench-{issue['threadID']}-{uuid.uuid4().hex[:8]}"}}
+        query = {
+            "operating_procedure": BENCHMARK_SOP,
+            "userID": issue["userID"],
+            "imageURL": issue.get("imageURL"),
+            "issueDescription": issue["issueDescription"]
+        }
+        started = time.perf_counter()
+        await atimed_stream(graph, node_timings, query, thread)
+        # Approve every pending tool, like /executions/approve does
+        while (await graph.aget_state(thread)).next:
+            await atimed_stream(graph, node_timings, None, thread)
+        run_timings.append(time.perf_counter() - started)
+
+
+def run_sop_graph(graph, issues, node_timings, run_timings):
+    # The SOP graph has async nodes and is driven with astream, as in the API
+    asyncio.run(arun_sop_graph(graph, issues, node_timings, run_timings))
+
+
+def summarize(name, node_timings, run_timings, llm_calls, llm_seconds):
+    total = sum(run_timings)
+    report = {
+        "graph": name,
+        "runs": len(run_timings),
+        "wall_seconds": round(total, 4),
+        "run_p50_ms": round(percentile(run_timings, 50) * 1000, 2),
+        "run_p95_ms": round(percentile(run_timings, 95) * 1000, 2),
+        "run_p99_ms": round(percentile(run_timings, 99) * 1000, 2),
+        "llm_calls": llm_calls,
+        "llm_seconds": round(llm_seconds, 4),
+        "overhead_seconds": round(total - llm_seconds, 4),
+        "nodes": {}
+    }
+    for node, timings in sorted(node_timings.items()):
+        report["nodes"][node] = {
+            "count": len(timings),
+            "p50_ms": round(percentile(timings, 50) * 1000, 2),
+            "p95_ms": round(percentile(timings, 95) * 1000, 2),
+            "p99_ms": round(percentile(timings, 99) * 1000, 2),
+        }
+    return report
+
+
+def print_report(report):
+    print(f"\n=== {report['graph']} graph: {report['runs']} runs in {report['wall_seconds']}s ===")
+    print(f"run p50/p95/p99 ms: {report['run_p50_ms']} / {report['run_p95_ms']} / {report['run_p99_ms']}")
+    print(f"fake LLM: {report['llm_calls']} calls, {report['llm_seconds']}s, overhead beyond LLM: {report['overhead_seconds']}s")
+    print(f"{'node':<20}{'count':>8}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}")
+    for node, stats in report["nodes"].items():
+        print(f"{node:<20}{stats['count']:>8}{stats['p50_ms']:>12}{stats['p95_ms']:>12}{stats['p99_ms']:>12}")
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB on Linux
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the LangGraph pipelines with a fake LLM")
+    parser.add_argument("--graph", choices=["customer", "sop", "both"], default="both")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="fixed latency of every fake LLM call")
+    parser.add_argument("--repeat", type=int, default=1, help="times the issues corpus is replayed")
+    parser.add_argument("--limit", type=int, default=None, help="only replay the first N issues")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the report to this file")
+    args = parser.parse_args()
+
+    llm_gateway.use_fake_backend(latency=args.llm_latency_ms / 1000)
+    forbid_network()
+    # Keep benchmark threads out of the persistent checkpoint store
+    os.environ.setdefault("SOP_CHECKPOINTER", "memory")
+    os.chdir(BACKEND_DIR)
+
+    issues = load_issues()[:args.limit] * args.repeat
+    reports = []
+
+    if args.graph in ("customer", "both"):
+        from agentapp import customerService
+        customerService.web_search_tool = FakeWebSearch()
+        graph = customerService.build_graph()
+        node_timings, run_timings = defaultdict(list), []
+        fake_llm_stats.reset()
+        run_customer_graph(graph, issues, node_timings, run_timings)
+        reports.append(summarize("customer", node_timings, run_timings, fake_llm_stats.calls, fake_llm_stats.seconds))
+
+    if args.graph in ("sop", "both"):
+        from agentapp.toolExecutionService import build_sopGraph
+        graph = build_sopGraph()
+        node_timings, run_timings = defaultdict(list), []
+        fake_llm_stats.reset()
+        run_sop_graph(graph, issues, node_timings, run_timings)
+        reports.append(summarize("sop", node_timings, run_timings, fake_llm_stats.calls, fake_llm_stats.seconds))
+
+    assert not network_attempts, f"benchmark is not offline, connections attempted to: {network_attempts}"
+
+    for report in reports:
+        print_report(report)
+    rss = peak_rss_mb()
+    print(f"\npeak RSS: {rss} MB")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"reports": reports, "peak_rss_mb": rss, "llm_latency_ms": args.llm_latency_ms}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import os
+import re
+import json
+import threading
+
+SOP_DIR = os.path.join(os.path.dirname(__file__), "sop")
+SOP_PATH = os.path.join(SOP_DIR, "damage_inference.json")
+ALIASES_PATH = os.path.join(SOP_DIR, "damage_aliases.json")
+
+# Trailing words YOLO labels often carry that are not part of the SOP keys
+LABEL_SUFFIXES = ("damage", "damaged")
+
+
+def normalize_label(label: str) -> str:
+    """
+    Normalize a detection label or SOP key, e.g. "Front-Bumper" / "front_bumper" -> "front bumper".
+    """
+    label = re.sub(r"[-_\s]+", " ", str(label).lower()).strip()
+    for suffix in LABEL_SUFFIXES:
+        if label.endswith(" " + suffix):
+            label = label[: -len(suffix) - 1].strip()
+    return label
+
+
+class DamageSopIndex:
+    """
+    Normalized, in-memory index of the damage SOP.
+
+    The SOP and alias files are read once and only re-read when their mtime
+    changes, so lookups never touch the disk. Probable damage summaries are
+    precomputed per SOP key.
+    """
+
+    def __init__(self, sop_path: str = SOP_PATH, aliases_path: str = ALIASES_PATH):
+        self.sop_path = sop_path
+        self.aliases_path = aliases_path
+        self._lock = threading.Lock()
+        self._mtimes = None
+        self._damages = {}
+        self._aliases = {}
+        self._summaries = {}
+
+    def _file_mtimes(self):
+        return tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in (self.sop_path, self.aliases_path))
+
+    def _load_json(self, path):
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _reload_if_changed(self):
+        mtimes = self._file_mtimes()
+        if mtimes == self._mtimes:
+            return
+        with self._lock:
+            if mtimes == self._mtimes:
+                return
+
+            damages = {normalize_label(key): list(values) for key, values in self._load_json(self.sop_path).items()}
+            aliases = {}
+            for alias, canonical in self._load_json(self.aliases_path).items():
+                canonical = normalize_label(canonical)
+                if canonical in damages:
+                    aliases[normalize_label(alias)] = canonical
+            summaries = {
+                key: f"\n  -> Probable Hidden/Associated Damages: {', '.join(values)}" if values else ""
+                for key, values in damages.items()
+            }
+
+            self._damages, self._aliases, self._summaries = damages, aliases, summaries
+            self._mtimes = mtimes
+            print(f"[INFO] damage SOP loaded with {len(damages)} entries and {len(aliases)} aliases")
+
+    def resolve(self, label: str):
+        """Canonical SOP key for a detection label, None if unknown."""
+        key = normalize_label(label)
+        if key in self._damages:
+            return key
+        return self._aliases.get(key)
+
+    def lookup(self, label: str) -> list:
+        """Probable hidden/associated damages for a detection label."""
+        return self.lookup_many([label])[label][0]
+
+    def lookup_many(self, labels) -> dict:
+        """
+        Batched lookup for all detections of a claim.
+
+        Returns:
+            dict: label -> (probable_damages, probable_info summary string)
+        """
+        self._reload_if_changed()
+        results = {}
+        for label in labels:
+            key = self.resolve(label)
+            if key is None:
+                results[label] = ([], "")
+            else:
+                results[label] = (self._damages[key], self._summaries[key])
+        return results
+
+
+# Shared index used by the image analyzer
+damage_sop_index = DamageSopIndex()
@@ -1,95 +1,142 @@
 # tools/image_analyzer.py
 import os
-from ultralytics import YOLO
+import threading
 import cv2
 import urllib.request
 from agentapp.llm_utils import callGroq
+from damageEvaluator.damage_sop import damage_sop_index
 
-# Load YOLO model once globally
+# YOLO model is loaded once globally, on first use
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "models", "best.pt")
-model = YOLO(MODEL_PATH)
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_yolo_model():
+    """Return the process wide YOLO model, loading the weights on first use."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from ultralytics import YOLO
+                _model = YOLO(MODEL_PATH)
+    return _model
+
 
 # Ensure output folder exists
 OUTPUT_DIR = "outputs"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Number of images sent to YOLO in a single forward pass
+YOLO_BATCH_SIZE = int(os.getenv("YOLO_BATCH_SIZE", "8"))
+
+
+def extract_damage_info(result):
+    """
+    Convert a single YOLO result into the damage_info list.
+    """
+    damage_info = []
+    for box in result.boxes:
+        conf = float(box.conf[0])
+        area = (box.xyxy[0][2] - box.xyxy[0][0]) * (box.xyxy[0][3] - box.xyxy[0][1])
+
+        # Simple severity estimation
+        if area < 5000:
+            severity = "Minor"
+        elif area < 15000:
+            severity = "Moderate"
+        else:
+            severity = "Severe"
+
+        label = result.names[int(box.cls[0])]
+
+        damage_info.append({
+            "label": label,
+            "severity": severity,
+            "confidence": round(conf, 3)
+        })
+    return damage_info
+
+
+def save_annotated(result, img_path: str):
+    """Save the annotated image of a YOLO result and return its path."""
+    annotated_img = result.plot()
+    output_path = os.path.join(OUTPUT_DIR, os.path.basename(img_path))
+    cv2.imwrite(output_path, annotated_img)
+    return output_path
+
 
 def detect_and_estimate(img_path: str):
     """
     Detect damages and estimate severity using YOLO.
     Returns (annotated_image_path, damage_info).
     """
-    results = model.predict(img_path, conf=0.3)
+    results = get_yolo_model().predict(img_path, conf=0.3)
 
     damage_info = []
     for r in results:
-        for box in r.boxes:
-            conf = float(box.conf[0])
-            area = (box.xyxy[0][2] - box.xyxy[0][0]) * (box.xyxy[0][3] - box.xyxy[0][1])
-
-            # Simple severity estimation
-            if area < 5000:
-                severity = "Minor"
-            elif area < 15000:
-                severity = "Moderate"
-            else:
-                severity = "Severe"
-
-            label = r.names[int(box.cls[0])]
-
-            damage_info.append({
-                "label": label,
-                "severity": severity,
-                "confidence": round(conf, 3)
-            })
+        damage_info.extend(extract_damage_info(r))
 
     # Save annotated image
-    annotated_img = results[0].plot()
-    output_path = os.path.join(OUTPUT_DIR, os.path.basename(img_path))
-    cv2.imwrite(output_path, annotated_img)
+    output_path = save_annotated(results[0], img_path)
 
     return output_path, damage_info
 
 
-def analyze_image(session_id: str, images: list, description: str):
+def detect_and_estimate_batch(img_paths: list, batch_size: int = None):
+    """
+    Detect damages for many images, running YOLO on chunks of batch_size images.
+    Returns a list of (annotated_image_path, damage_info) in the order of img_paths.
+    """
+    batch_size = batch_size or YOLO_BATCH_SIZE
+    detections = []
+    for start in range(0, len(img_paths), batch_size):
+        chunk = img_paths[start:start + batch_size]
+        results = get_yolo_model().predict(chunk, conf=0.3, batch=len(chunk))
+
+        # YOLO returns one result per source image, in input order
+        for img_path, r in zip(chunk, results):
+            detections.append((save_annotated(r, img_path), extract_damage_info(r)))
+    return detections
+
+
+def analyze_image(session_id: str, images: list, description: str, batch_size: int = None):
     """
     Runs YOLO detection on multiple images.
+    All existing images of the claim are detected in batches before the per-image reasoning step.
     Returns structured JSON with paths + detected damages.
     """
     print(f"images: >>>>>>>>> {images}")
     session_id = session_id or "session-less"
     results = []
     matchMetrix = None
+
+    existing_images = [img_path for img_path in images if os.path.exists(img_path)]
+    detections = dict(zip(existing_images, detect_and_estimate_batch(existing_images, batch_size)))
+
+    # Look up probable damages in SOP for all detections of the claim at once
+    sop_lookup = damage_sop_index.lookup_many(
+        {d["label"] for _, damage_info in detections.values() for d in damage_info}
+    )
+
     for img_path in images:
         print(f"img_path: >>>>>>>> ",img_path)
-        if not os.path.exists(img_path):
+        if img_path not in detections:
             results.append({"image": img_path, "error": "file not found"})
             continue
 
-        output_path, damage_info = detect_and_estimate(img_path)
-
-        # Load SOP
-        sop_path = os.path.join(os.path.dirname(__file__), "sop", "damage_inference.json")
-        damage_sop = {}
-        if os.path.exists(sop_path):
-            import json
-            with open(sop_path, "r") as f:
-                damage_sop = json.load(f)
+        output_path, damage_info = detections[img_path]
 
         if not damage_info:
             damage_summary = "No visible damage detected."
         else:
             damage_summary_lines = []
             for d in damage_info:
-                label = d['label'].lower()
-                
-                # Look up probable damages in SOP
-                probable_damages = damage_sop.get(label, [])
+                label = d['label']
+
+                probable_damages, probable_info = sop_lookup[label]
                 print(f"probable_damages for '{label}': >>>>>>>> ", probable_damages)
-                probable_info = ""
-                if probable_damages:
-                    probable_info = f"\n  -> Probable Hidden/Associated Damages: {', '.join(probable_damages)}"
-                
+
                 print(f"probable_info: >>>>>>>> ", probable_info)
 
                 damage_summary_lines.append(f"- {d['label']} ({d['severity']}, Confidence: {d['confidence']:.2f}){probable_info}")
@@ -1,9 +1,102 @@
 import argparse
+import threading
+from collections import OrderedDict
 import torch
 from PIL import Image
 from transformers import CLIPProcessor, CLIPModel
 import os
 
+CLIP_MODEL_ID = os.getenv("CLIP_MODEL_ID", "openai/clip-vit-base-patch32")
+CLAIM_EMBEDDING_CACHE_SIZE = int(os.getenv("CLIP_CLAIM_CACHE_SIZE", "256"))
+
+# Fixed contrasting labels, the claim itself is always scored as label 0
+NEGATIVE_LABELS = [
+    "a photo of an undamaged car",
+    "a photo of a car with different damage",
+    "a photo of a random scene"
+]
+
+
+class ClipClaimScorer:
+    """
+    Long-lived CLIP scorer.
+
+    The model weights and the negative label embeddings are loaded once, claim
+    description embeddings are kept in a small LRU cache so a call only has to
+    encode the image.
+    """
+
+    def __init__(self, model_id: str = CLIP_MODEL_ID, cache_size: int = CLAIM_EMBEDDING_CACHE_SIZE):
+        print(f"Loading CLIP model: {model_id}...")
+        self.model = CLIPModel.from_pretrained(model_id)
+        self.model.eval()
+        self.processor = CLIPProcessor.from_pretrained(model_id)
+        self.logit_scale = self.model.logit_scale.exp()
+        self.negative_embeddings = self._encode_text(NEGATIVE_LABELS)
+
+        self.cache_size = cache_size
+        self._claim_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @torch.no_grad()
+    def _encode_text(self, labels):
+        inputs = self.processor(text=labels, return_tensors="pt", padding=True)
+        features = self.model.get_text_features(**inputs)
+        return features / features.norm(dim=-1, keepdim=True)
+
+    @torch.no_grad()
+    def _encode_image(self, image):
+        inputs = self.processor(images=image, return_tensors="pt")
+        features = self.model.get_image_features(**inputs)
+        return features / features.norm(dim=-1, keepdim=True)
+
+    def claim_embedding(self, claim_label: str):
+        """Return the normalized text embedding for a claim label, using the LRU cache."""
+        with self._cache_lock:
+            if claim_label in self._claim_cache:
+                self._claim_cache.move_to_end(claim_label)
+                return self._claim_cache[claim_label]
+
+        embedding = self._encode_text([claim_label])
+
+        with self._cache_lock:
+            self._claim_cache[claim_label] = embedding
+            self._claim_cache.move_to_end(claim_label)
+            while len(self._claim_cache) > self.cache_size:
+                self._claim_cache.popitem(last=False)
+        return embedding
+
+    def score(self, image, claim_description: str):
+        """
+        Score the image against the claim and the fixed negative labels.
+
+        Returns:
+            (candidate_labels, probs): probs has shape [1, len(candidate_labels)]
+        """
+        claim_label = f"a photo of {claim_description}"
+        text_embeddings = torch.cat([self.claim_embedding(claim_label), self.negative_embeddings], dim=0)
+        image_embedding = self._encode_image(image)
+
+        # Same computation as CLIPModel.forward's logits_per_image
+        logits_per_image = self.logit_scale * image_embedding @ text_embeddings.t()
+        probs = logits_per_image.softmax(dim=1)
+        return [claim_label] + NEGATIVE_LABELS, probs
+
+
+_scorer = None
+_scorer_lock = threading.Lock()
+
+
+def get_clip_scorer():
+    """Return the process wide CLIP scorer, loading the weights on first use."""
+    global _scorer
+    if _scorer is None:
+        with _scorer_lock:
+            if _scorer is None:
+                _scorer = ClipClaimScorer()
+    return _scorer
+
+
 def verify_claim_clip(image_path, claim_description):
     """
     Verifies if the claim description matches the visual evidence in the image using CLIP.
@@ -16,37 +109,13 @@ def verify_claim_clip(image_path, claim_description):
         return f"Error: Image file not found at {image_path}"
 
     try:
-        # Load model and processor
-        model_id = "openai/clip-vit-base-patch32"
-        print(f"Loading CLIP model: {model_id}...")
-        model = CLIPModel.from_pretrained(model_id)
-        processor = CLIPProcessor.from_pretrained(model_id)
-
-        image = Image.open(image_path)
-
-        # Prepare inputs
-        # We will compare the claim against a few contrasting statements to see which one fits best,
-        # or just check the score of the claim directly?
-        # CLIP works best with a set of candidate labels.
-        # Let's try to frame it as a binary classification: "The claim is true" vs "The claim is false"
-        # Or better: "A photo of [claim]" vs "A photo of something else"
-        
-        # Actually, let's just use the claim and a generic negative prompt.
-        # Or maybe just the claim and see the raw score? Raw scores are not normalized.
-        # Standard CLIP usage is zero-shot classification.
-        
-        candidate_labels = [
-            f"a photo of {claim_description}",
-            "a photo of an undamaged car",
-            "a photo of a car with different damage",
-            "a photo of a random scene"
-        ]
-        
-        inputs = processor(text=candidate_labels, images=image, return_tensors="pt", padding=True)
-
-        outputs = model(**inputs)
-        logits_per_image = outputs.logits_per_image  # this is the image-text similarity score
-        probs = logits_per_image.softmax(dim=1)  # we can take the softmax to get the label probabilities
+        scorer = get_clip_scorer()
+
+        image = Image.open(image_path).convert("RGB")
+
+        # CLIP works best as zero-shot classification, so the claim is compared
+        # against a few contrasting statements to see which one fits best.
+        candidate_labels, probs = scorer.score(image, claim_description)
 
         print("\n[CLIP Analysis]:")
         for i, label in enumerate(candidate_labels):
@@ -58,7 +127,7 @@ def verify_claim_clip(image_path, claim_description):
         confidence = probs[0][best_match_idx].item()
 
         result = f"Best match: '{best_match_label}' with confidence {confidence:.2f}"
-        
+
         # Simple logic: if the first label (the claim) is the highest or has a high enough score
         if best_match_idx == 0:
              return f"MATCH: The image seems to support the claim. ({result})"
@@ -1,16 +1,50 @@
 from fastapi import FastAPI, Request, Response, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
 import os
-from agentapp.customerService import build_graph
+import json
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from agentapp.customerService import build_graph, GENERATION_TAG, answer_cache, lookup_cached_answer, cache_answer, embedding_model, local_router
 
 from agentapp.toolExecutionService import build_sopGraph
-
+from agentapp.graphExecutor import graph_executor, sop_executor
+from agentapp.metrics import record_executor_stats, render_metrics
+from agentapp.llmGateway import llm_gateway
+from agentapp.repository import repository
+from agentapp.responseCache import SerializedResponse, SerializedResponseCache, etag_matches
+from agentapp.singleFlight import SingleFlight, normalize_question
+from agentapp.resourceRegistry import resource_registry, WARMUP_ON_STARTUP, WARMUP_RESOURCES, RESOURCE_RETRY_SECONDS
+
+# Building the graphs is cheap, models and vector stores load lazily through the resource registry
 graph = build_graph()
 sopGraph = build_sopGraph()
-app = FastAPI()
+
+async def retry_failed_resources():
+    """Reload failed warm-up resources in the background so /readyz recovers without traffic."""
+    while True:
+        await asyncio.sleep(RESOURCE_RETRY_SECONDS)
+        failed = resource_registry.failed(WARMUP_RESOURCES)
+        if failed:
+            print(f"[INFO] retrying failed resources: {', '.join(failed)}")
+            await asyncio.to_thread(resource_registry.warm_up, failed)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so the port opens immediately, /readyz reports when done
+    if WARMUP_ON_STARTUP:
+        app.state.warmup_task = asyncio.create_task(asyncio.to_thread(resource_registry.warm_up, WARMUP_RESOURCES))
+    retry_task = asyncio.create_task(retry_failed_resources()) if RESOURCE_RETRY_SECONDS > 0 else None
+    yield
+    if retry_task is not None:
+        retry_task.cancel()
+
+app = FastAPI(lifespan=lifespan)
 
 # Mount static files
 app.mount("/images", StaticFiles(directory="images"), name="images")
@@ -23,6 +57,7 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 class Issue(BaseModel):
@@ -45,6 +80,16 @@ class LoginResponse(BaseModel):
 class StartExecutionRequest(BaseModel):
     issueDescription: str
 
+class BatchIssue(BaseModel):
+    issueDescription: str
+    threadID: Optional[str] = None
+    userID: Optional[str] = None
+
+class StartExecutionBatchRequest(BaseModel):
+    issues: List[BatchIssue]
+    concurrency: Optional[int] = None
+    itemTimeoutSeconds: Optional[float] = None
+
 class sopQuery(BaseModel):
     operating_procedure: str
     userID: str
@@ -53,78 +98,6 @@ class sopQuery(BaseModel):
     description: Optional[str] = None
 
 
-payment_status_data = [
-    {"userID": "U001", "paymentStatus": "Pending", "policyNumber": "12345", "amount": 1500.00},
-    {"userID": "U002", "paymentStatus": "Completed", "policyNumber": "12346", "amount": 2200.50},
-    {"userID": "U003", "paymentStatus": "Failed", "policyNumber": "12347", "amount": 800.75},
-    {"userID": "U004", "paymentStatus": "Processing", "policyNumber": "12348", "amount": 3100.25},
-    {"userID": "U005", "paymentStatus": "Completed", "policyNumber": "12349", "amount": 950.00},
-    {"userID": "U006", "paymentStatus": "Pending", "policyNumber": "12350", "amount": 1750.80}
-]
-
-transaction_documents = [
-    {"userID": "U001", "transactionID": "TXN001", "transactionStatus": "Pending", "documentType": "Payment Receipt", "documentID": "DOC12345", "createdDate": "2024-01-15", "lastUpdated": "2024-01-16"},
-    {"userID": "U002", "transactionID": "TXN002", "transactionStatus": "Completed", "documentType": "Payment Confirmation", "documentID": "DOC12346", "createdDate": "2024-01-14", "lastUpdated": "2024-01-15"},
-    {"userID": "U003", "transactionID": "TXN003", "transactionStatus": "Failed", "documentType": "Payment Failure Notice", "documentID": "DOC12347", "createdDate": "2024-01-13", "lastUpdated": "2024-01-14"},
-    {"userID": "U004", "transactionID": "TXN004", "transactionStatus": "Processing", "documentType": "Payment Processing", "documentID": "DOC12348", "createdDate": "2024-01-16", "lastUpdated": "2024-01-16"},
-    {"userID": "U005", "transactionID": "TXN005", "transactionStatus": "Completed", "documentType": "Payment Receipt", "documentID": "DOC12349", "createdDate": "2024-01-12", "lastUpdated": "2024-01-13"},
-    {"userID": "U006", "transactionID": "TXN006", "transactionStatus": "Pending", "documentType": "Payment Authorization", "documentID": "DOC12350", "createdDate": "2024-01-17", "lastUpdated": "2024-01-17"}
-]
-
-issues_data = [
-    {"userID": "U001", "userName": "John Doe", "issueDescription": "Payment status not reflected for policy 12345", "issueTitle": "Payment Issue", "threadID": "c10b26e3-9466-4c7a-9130-37f2ec18e558"},
-    {"userID": "U002", "userName": "Jane Smith", "issueDescription": "Need some correction for second name from policy 12324", "issueTitle": "Update Second Name", "threadID": "cfb8dcf3-3f2f-4a47-bef5-3cfbc495fc1b"},
-    {"userID": "U003", "userName": "Mike Johnson", "issueDescription": "Data export functionality broken", "issueTitle": "Export Bug", "threadID": "d4a93904-99df-4b20-9b34-06a01391c5a5"},
-    {"userID": "U004", "userName": "Sarah Wilson", "issueDescription": "Car windows and side doors damages on accident, Please help to calculate accident vehicle damage estimation for policy number 671289", "issueTitle": "Car Damage Estimation", "threadID": "1de03fa9-96a1-4988-9989-54b8dcd4a9f1", "imageURL": "http://localhost:8000/images/accident-damage-car.jpg"},
-    {"userID": "U005", "userName": "David Brown", "issueDescription": "Page loading very slowly", "issueTitle": "Performance Issue", "threadID": "4a33b890-3028-4204-8f42-1dc469ccf214"},
-    {"userID": "U006", "userName": "Lisa Garcia", "issueDescription": "Cannot upload files", "issueTitle": "Upload Error", "threadID": "2ff2a7e7-6f05-4a6b-b406-d5a99f6d7f7d"},
-    {"userID": "U007", "userName": "Robert Taylor", "issueDescription": "Search function returns no results", "issueTitle": "Search Bug", "threadID": "db44e64d-cb41-42a4-8b64-982046f06e8a"},
-    {"userID": "U008", "userName": "Emily Davis", "issueDescription": "Profile picture not displaying", "issueTitle": "Display Issue", "threadID": "9b8a5410-3cdb-4fd7-85e3-1d57a2e357a8"},
-    {"userID": "U009", "userName": "James Miller", "issueDescription": "Password reset not working", "issueTitle": "Reset Error", "threadID": "b92857e4-8db2-4958-b0a7-b6151b3d841a"},
-    {"userID": "U010", "userName": "Maria Rodriguez", "issueDescription": "Mobile app crashes on startup", "issueTitle": "Crash Bug", "threadID": "f53d96bb-4972-4b56-b62e-55a497e2123e"},
-    {"userID": "U011", "userName": "Kevin Lee", "issueDescription": "Data synchronization failed", "issueTitle": "Sync Error", "threadID": "4b41ff94-4c3e-47ab-bbf5-c00e33f6c8cb"},
-    {"userID": "U012", "userName": "Amanda White", "issueDescription": "Report generation timeout", "issueTitle": "Timeout Issue", "threadID": "fbc5013a-7e0a-45cb-9e2a-49707332c5f1"},
-    {"userID": "U013", "userName": "Christopher Hall", "issueDescription": "API response returning 500 error", "issueTitle": "API Error", "threadID": "ae7a4bc4-4ee7-43b3-8d79-29b1e1c8ef83"},
-    {"userID": "U014", "userName": "Jessica Young", "issueDescription": "Calendar events not saving", "issueTitle": "Save Bug", "threadID": "ed1df00e-d5f7-4048-805a-287c6463038b"},
-    {"userID": "U015", "userName": "Daniel King", "issueDescription": "Notification settings reset automatically", "issueTitle": "Settings Issue", "threadID": "3d0b4a19-f74f-4146-8e19-d2fc91b9f81b"},
-    {"userID": "U016", "userName": "Ashley Wright", "issueDescription": "Chart data not updating", "issueTitle": "Chart Bug", "threadID": "0e2298c5-85de-4c52-b0c5-cb9f6e03f94d"},
-    {"userID": "U017", "userName": "Matthew Lopez", "issueDescription": "User permissions not applied correctly", "issueTitle": "Permission Error", "threadID": "b74e13cf-5db7-4b37-9d25-5f532999f272"},
-    {"userID": "U018", "userName": "Stephanie Hill", "issueDescription": "Form validation errors", "issueTitle": "Validation Bug", "threadID": "9fd71258-671c-4a3a-9023-3bb8d49e36e1"},
-    {"userID": "U019", "userName": "Andrew Scott", "issueDescription": "Database connection timeout", "issueTitle": "DB Error", "threadID": "a5748705-ff17-4ee0-bc87-0e0a0fa87f22"},
-    {"userID": "U020", "userName": "Rachel Green", "issueDescription": "Print functionality not working", "issueTitle": "Print Issue", "threadID": "38f927f5-b1b3-46c2-bfd2-c1ee7e0c6e6a"},
-    {"userID": "U021", "userName": "Joshua Adams", "issueDescription": "Theme settings not persisting", "issueTitle": "Theme Bug", "threadID": "4e134918-5b7d-4629-a2da-b4380e8a0533"},
-    {"userID": "U022", "userName": "Nicole Baker", "issueDescription": "Backup process failing", "issueTitle": "Backup Error", "threadID": "da15e8c7-3d37-4935-b87e-dc2323b02e13"},
-    {"userID": "U023", "userName": "Ryan Gonzalez", "issueDescription": "Language translation missing", "issueTitle": "Translation Issue", "threadID": "ccf44b90-6b37-4d19-9c5e-bb41df58c8f5"},
-    {"userID": "U024", "userName": "Megan Nelson", "issueDescription": "Video playback stuttering", "issueTitle": "Video Bug", "threadID": "e99ef2bc-60a2-4c5a-987b-6dc038a06b57"},
-    {"userID": "U025", "userName": "Brandon Carter", "issueDescription": "Shopping cart items disappearing", "issueTitle": "Cart Error", "threadID": "1ac9f26a-0e09-4a20-9b2d-4241b31d9e8f"},
-    {"userID": "U026", "userName": "Samantha Mitchell", "issueDescription": "Two-factor authentication failing", "issueTitle": "2FA Issue", "threadID": "94854c8e-d9b7-4f9c-b59e-ec31d5ad4c8f"},
-    {"userID": "U027", "userName": "Justin Perez", "issueDescription": "Image compression quality poor", "issueTitle": "Image Bug", "threadID": "7b82d8de-5c1e-4ed7-8c06-1c059dbbb8b4"},
-    {"userID": "U028", "userName": "Brittany Roberts", "issueDescription": "Keyboard shortcuts not responding", "issueTitle": "Shortcut Error", "threadID": "858c273b-f192-4d33-8c76-84d7c5b0b5e3"},
-    {"userID": "U029", "userName": "Tyler Turner", "issueDescription": "Auto-save feature not working", "issueTitle": "Save Issue", "threadID": "c1b7b4e2-1f77-4c74-bb1f-02a97b77dc2a"},
-    {"userID": "U030", "userName": "Kayla Phillips", "issueDescription": "Social media integration broken", "issueTitle": "Social Bug", "threadID": "f8cccf6c-72d0-4d15-8f1a-68013a002dc7"},
-    {"userID": "U031", "userName": "Nathan Campbell", "issueDescription": "Memory usage extremely high", "issueTitle": "Memory Issue", "threadID": "ea5c4905-7761-4848-bef0-6df40361e995"},
-    {"userID": "U032", "userName": "Alexis Parker", "issueDescription": "Drag and drop not functioning", "issueTitle": "DnD Error", "threadID": "63b3e5e7-53c9-4969-9a9a-356f51211b3f"},
-    {"userID": "U033", "userName": "Jordan Evans", "issueDescription": "Timezone conversion incorrect", "issueTitle": "Timezone Bug", "threadID": "7c54f8ab-0f21-4f64-bb8b-b60cbf3ac52b"},
-    {"userID": "U034", "userName": "Taylor Edwards", "issueDescription": "Batch processing stuck", "issueTitle": "Batch Issue", "threadID": "16ffb93b-9c25-4b07-b0a0-2b86703b6c2e"},
-    {"userID": "U035", "userName": "Morgan Collins", "issueDescription": "SSL certificate expired", "issueTitle": "SSL Error", "threadID": "d83cc3d3-1f5a-4f5e-9f4b-7c97b00c1c86"},
-    {"userID": "U036", "userName": "Casey Stewart", "issueDescription": "Pagination not working correctly", "issueTitle": "Pagination Bug", "threadID": "e53a7b91-5cc7-4df7-bf2a-1c4816c78542"},
-    {"userID": "U037", "userName": "Alex Sanchez", "issueDescription": "Webhook delivery failing", "issueTitle": "Webhook Issue", "threadID": "4b69e08d-0c55-4931-894c-6508d72db376"},
-    {"userID": "U038", "userName": "Jamie Morris", "issueDescription": "Cache invalidation problems", "issueTitle": "Cache Error", "threadID": "8c6cc2c4-7cf3-4f73-bf6c-f0b2a3c49bda"},
-    {"userID": "U039", "userName": "Riley Rogers", "issueDescription": "File permissions too restrictive", "issueTitle": "Permission Bug", "threadID": "f239a29f-24d1-4c73-9466-056d6cbf8d55"},
-    {"userID": "U040", "userName": "Avery Reed", "issueDescription": "Scheduled tasks not running", "issueTitle": "Scheduler Issue", "threadID": "c8201bfb-7829-4b4f-b5d5-cf429d4c03f4"},
-    {"userID": "U041", "userName": "Quinn Cook", "issueDescription": "Load balancer health check failing", "issueTitle": "LB Error", "threadID": "50439c24-e1e2-43c5-b169-4447ce19751c"},
-    {"userID": "U042", "userName": "Sage Bailey", "issueDescription": "Session timeout too aggressive", "issueTitle": "Session Bug", "threadID": "e8f90547-0b8c-49a0-bdbe-71e76dbb92ba"},
-    {"userID": "U043", "userName": "River Rivera", "issueDescription": "Audit log entries missing", "issueTitle": "Audit Issue", "threadID": "dbda19ef-4d23-4c66-9345-00d06db02c58"},
-    {"userID": "U044", "userName": "Phoenix Cooper", "issueDescription": "Rate limiting too strict", "issueTitle": "Rate Error", "threadID": "dfbc8e50-c37d-465c-9366-31e9309ad12a"},
-    {"userID": "U045", "userName": "Skylar Richardson", "issueDescription": "Geolocation services unavailable", "issueTitle": "Location Bug", "threadID": "f836f8e4-e792-44df-8c6f-223abbd7f577"},
-    {"userID": "U046", "userName": "Dakota Cox", "issueDescription": "Encryption key rotation failed", "issueTitle": "Crypto Issue", "threadID": "a24fcff7-d3a8-4405-9407-59cb8a7a2dcf"},
-    {"userID": "U047", "userName": "Rowan Ward", "issueDescription": "Microservice communication timeout", "issueTitle": "Service Error", "threadID": "e43d0a52-7e0a-4f45-bacb-5f8eeb8a8cfd"},
-    {"userID": "U048", "userName": "Sage Torres", "issueDescription": "Container orchestration failing", "issueTitle": "Container Bug", "threadID": "f4de7ae0-309a-40e8-bc13-b97a6031a52a"},
-    {"userID": "U049", "userName": "Finley Peterson", "issueDescription": "Message queue overflow", "issueTitle": "Queue Issue", "threadID": "3a6e46e9-4528-40db-9f4b-b367685f90c6"},
-    {"userID": "U050", "userName": "Emery Gray", "issueDescription": "CDN cache not updating", "issueTitle": "CDN Error", "threadID": "1fd6ad94-30a6-46fc-bb20-8c93900d83b2"}
-]
-
-
 class ApprovalRequest(BaseModel):
     threadID: str
     approved: bool
@@ -142,6 +115,14 @@ async def options_login():
 async def options_start_execution():
     return Response(status_code=200)
 
+@app.options("/start-execution/stream")
+async def options_start_execution_stream():
+    return Response(status_code=200)
+
+@app.options("/start-execution/batch")
+async def options_start_execution_batch():
+    return Response(status_code=200)
+
 @app.options("/process-query")
 async def options_process_sopquery():
     return Response(status_code=200)
@@ -172,9 +153,82 @@ async def login(request: LoginRequest):
 async def root():
     return {"message": "FastAPI server is running"}
 
-@app.get("/issues", response_model=List[Issue])
-async def get_issues():
-    return issues_data
+@app.get("/healthz")
+async def healthz():
+    """Process is up"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Models and vector stores are warm"""
+    ready = resource_registry.is_ready(WARMUP_RESOURCES)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "resources": resource_registry.status()}
+    )
+
+# /issues page size when a cursor is given without limit, the next page cursor is returned
+# in the X-Next-Cursor header. Without limit and cursor every issue is returned.
+ISSUES_DEFAULT_LIMIT = int(os.getenv("ISSUES_DEFAULT_LIMIT", "100"))
+ISSUES_MAX_LIMIT = int(os.getenv("ISSUES_MAX_LIMIT", "1000"))
+# gzip /issues bodies of at least this many bytes for clients accepting it, 0 disables gzip
+ISSUES_GZIP_MIN_BYTES = int(os.getenv("ISSUES_GZIP_MIN_BYTES", "1024"))
+
+# Serialized /issues pages, rebuilt only when the issues table version changes
+issues_response_cache = SerializedResponseCache(max_entries=int(os.getenv("ISSUES_RESPONSE_CACHE_SIZE", "128")))
+
+def build_issues_response(filters: dict, cursor: Optional[str], limit: Optional[int]) -> SerializedResponse:
+    """Validate and serialize one /issues page"""
+    page = repository.issues.page(filters, cursor, limit)
+    body = json.dumps(jsonable_encoder([Issue(**row) for row in page.rows])).encode("utf-8")
+    return SerializedResponse(body, {"X-Next-Cursor": page.next_cursor} if page.next_cursor is not None else {})
+
+ISSUES_RESPONSE_HEADERS = {
+    "ETag": {"description": "Strong ETag of the body, send it back in If-None-Match", "schema": {"type": "string"}},
+    "X-Next-Cursor": {"description": "Cursor of the next page, absent on the last page and on unpaginated responses", "schema": {"type": "string"}},
+}
+
+@app.get(
+    "/issues",
+    response_class=Response,
+    responses={
+        200: {"model": List[Issue], "description": "Issues of the page, all issues without limit and cursor", "headers": ISSUES_RESPONSE_HEADERS},
+        304: {"description": "If-None-Match matched, the issues are unchanged", "headers": ISSUES_RESPONSE_HEADERS},
+        400: {"description": "Invalid cursor"},
+    },
+)
+async def get_issues(request: Request, cursor: Optional[str] = None, limit: Optional[int] = None,
+                     userID: Optional[str] = None, threadID: Optional[str] = None, issueTitle: Optional[str] = None):
+    """
+    Issues in creation order, filtered on userID / threadID / issueTitle.
+    Without limit and cursor all issues are returned in one response. With either,
+    pages of at most limit issues are returned, pass the X-Next-Cursor header of a
+    response as cursor to get the next page.
+
+    Pages are served as cached bytes with a strong ETag, If-None-Match answers 304
+    while the issues are unchanged.
+    """
+    if limit is not None or cursor is not None:
+        limit = max(1, min(ISSUES_DEFAULT_LIMIT if limit is None else limit, ISSUES_MAX_LIMIT))
+    filters = {"userID": userID, "threadID": threadID, "issueTitle": issueTitle}
+    try:
+        cached = issues_response_cache.get(
+            (cursor, limit, userID, threadID, issueTitle),
+            repository.issues.version,
+            lambda: build_issues_response(filters, cursor, limit)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding", **cached.headers}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+
+    body = cached.body
+    if ISSUES_GZIP_MIN_BYTES and len(body) >= ISSUES_GZIP_MIN_BYTES and "gzip" in request.headers.get("accept-encoding", ""):
+        body = cached.gzipped()
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @app.post("/process-sopquery")
@@ -184,7 +238,7 @@ async def process_sopquery(request: sopQuery):
     thread = {"configurable": {"thread_id": request.threadID}}
     query = {"operating_procedure": request.operating_procedure, "userID": request.userID, "imageURL": request.imageURL, "issueDescription":request.description}
 
-    response = sopGraph.invoke(query, thread)
+    response = await sop_executor.arun(sopGraph.ainvoke, query, thread)
 
     print(f"SOP sopquery invocation response: {response}")
 
@@ -216,18 +270,170 @@ async def process_sopquery(request: sopQuery):
     
     return {"status": "success", "message": "SOP execution started", "response": toolRes, "response_metadata": response_metadata}
 
+# Identical questions in flight at the same time share one graph execution
+start_execution_flight = SingleFlight("start-execution")
+
+async def execute_question(question: str):
+    """
+    Answer a question from the semantic cache or by running the customer-service graph.
+
+    Returns:
+        (response, cached)
+    """
+    # Paraphrases of an already answered question are served without any LLM call
+    cached_response = await asyncio.to_thread(lookup_cached_answer, question)
+    if cached_response is not None:
+        return cached_response, True
+
+    # Add recursion limit config to prevent infinite loops
+    config = {"recursion_limit": 50}
+    response = await graph_executor.run(graph.invoke, {"question": question}, config=config)
+    print(f"SOP graph invocation response: {response}")
+    await asyncio.to_thread(cache_answer, question, response)
+    return response, False
+
 @app.post("/start-execution")
 async def start_execution(request: StartExecutionRequest):
     print(f"SOP Execution started for issue: {request.issueDescription}")
-    # Add recursion limit config to prevent infinite loops
+
+    (response, cached), coalesced = await start_execution_flight.do(
+        normalize_question(request.issueDescription),
+        lambda: execute_question(request.issueDescription)
+    )
+    return {"status": "success", "message": "SOP execution started", "response": response, "cached": cached, "coalesced": coalesced}
+
+# Bulk triage limits, a request can lower them but not raise them
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+BATCH_ITEM_TIMEOUT_SECONDS = float(os.getenv("BATCH_ITEM_TIMEOUT_SECONDS", "120"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+
+@app.post("/start-execution/batch")
+async def start_execution_batch(request: StartExecutionBatchRequest):
+    """
+    Run the customer-service graph over many issues and stream one NDJSON line per
+    issue as it completes, followed by a summary line.
+
+    Items run through the same cache and coalescing as /start-execution, at most
+    `concurrency` at a time, each within `itemTimeoutSeconds`. A failed or timed out
+    item is reported on its own line and does not stop the batch. A timed out graph
+    run cannot be cancelled in its worker thread, it finishes in the background within
+    its loop budget and keeps its batch slot until then.
+    """
+    if len(request.issues) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} issues per batch")
+
+    requested_concurrency = BATCH_MAX_CONCURRENCY if request.concurrency is None else request.concurrency
+    concurrency = max(1, min(requested_concurrency, BATCH_MAX_CONCURRENCY))
+    requested_timeout = BATCH_ITEM_TIMEOUT_SECONDS if request.itemTimeoutSeconds is None else request.itemTimeoutSeconds
+    item_timeout = max(0, min(requested_timeout, BATCH_ITEM_TIMEOUT_SECONDS))
+    semaphore = asyncio.Semaphore(concurrency)
+    print(f"SOP batch execution started for {len(request.issues)} issues, concurrency {concurrency}")
+
+    def release_slot(work):
+        semaphore.release()
+        # Mark the exception of a run nobody waits for anymore as retrieved
+        if not work.cancelled():
+            work.exception()
+
+    async def run_item(index: int, issue: BatchIssue):
+        result = {"index": index, "threadID": issue.threadID, "userID": issue.userID}
+        await semaphore.acquire()
+        started = time.perf_counter()
+        # The slot is released when the run finishes, not when the item times out
+        work = asyncio.ensure_future(start_execution_flight.do(
+            normalize_question(issue.issueDescription),
+            lambda: execute_question(issue.issueDescription)
+        ))
+        work.add_done_callback(release_slot)
+        try:
+            (response, cached), coalesced = await asyncio.wait_for(asyncio.shield(work), timeout=item_timeout)
+            result.update({"status": "success", "response": response, "cached": cached, "coalesced": coalesced})
+        except asyncio.TimeoutError:
+            result.update({"status": "timeout", "message": f"No result within {item_timeout}s"})
+        except Exception as e:
+            print(f"SOP batch item {index} failed: {e}")
+            result.update({"status": "error", "message": str(e)})
+        result["elapsedSeconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    async def item_stream():
+        started = time.perf_counter()
+        counts = {"success": 0, "error": 0, "timeout": 0}
+        tasks = [asyncio.create_task(run_item(index, issue)) for index, issue in enumerate(request.issues)]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                counts[result["status"]] += 1
+                yield json.dumps(jsonable_encoder(result)) + "\n"
+        finally:
+            # Client went away: drop the items that did not start yet
+            for task in tasks:
+                task.cancel()
+
+        summary = {"total": len(tasks), **counts, "elapsedSeconds": round(time.perf_counter() - started, 3)}
+        yield json.dumps({"summary": summary}) + "\n"
+
+    return StreamingResponse(item_stream(), media_type="application/x-ndjson", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def sse_event(event: str, payload) -> str:
+    """Format a server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(payload))}\n\n"
+
+@app.post("/start-execution/stream")
+async def start_execution_stream(request: StartExecutionRequest):
+    """
+    Stream the customer-service graph as server-sent events.
+
+    Events:
+        node: a node finished, with its state update
+        token: a chunk of the generated answer
+        final: the same payload /start-execution returns
+        error: the graph failed
+    """
+    print(f"SOP streaming execution started for issue: {request.issueDescription}")
     config = {"recursion_limit": 50}
-    response = graph.invoke({"question": request.issueDescription}, config=config)
-    print(f"SOP graph invocation response: {response}")
-    return {"status": "success", "message": "SOP execution started", "response": response}
+
+    async def event_stream():
+        cached_response = await asyncio.to_thread(lookup_cached_answer, request.issueDescription)
+        if cached_response is not None:
+            yield sse_event("final", {"status": "success", "message": "SOP execution started", "response": cached_response, "cached": True})
+            return
+
+        final_state = None
+        try:
+            async for mode, chunk in graph_executor.stream(
+                graph.stream,
+                {"question": request.issueDescription},
+                config=config,
+                stream_mode=["updates", "messages", "values"]
+            ):
+                if mode == "updates":
+                    for node, update in chunk.items():
+                        yield sse_event("node", {"node": node, "update": update})
+                elif mode == "messages":
+                    message, metadata = chunk
+                    if GENERATION_TAG in metadata.get("tags", []) and message.content:
+                        yield sse_event("token", {"node": metadata.get("langgraph_node"), "content": message.content})
+                else:
+                    final_state = chunk
+        except Exception as e:
+            print(f"SOP streaming execution failed: {e}")
+            yield sse_event("error", {"status": "error", "message": str(e)})
+            return
+
+        print(f"SOP graph streaming response: {final_state}")
+        await asyncio.to_thread(cache_answer, request.issueDescription, final_state)
+        yield sse_event("final", {"status": "success", "message": "SOP execution started", "response": final_state, "cached": False})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/getPaymentStatus/{userID}")
 async def get_payment_status(userID: str):
-    payment_info = next((item for item in payment_status_data if item["userID"] == userID), None)
+    payment_info = repository.payments.get("userID", userID)
     if payment_info:
         return payment_info
     else:
@@ -235,12 +441,24 @@ async def get_payment_status(userID: str):
 
 @app.get("/getTransactionDoc/{userID}")
 async def get_transaction_doc(userID: str):
-    transaction_doc = next((item for item in transaction_documents if item["userID"] == userID), None)
+    transaction_doc = repository.transaction_documents.get("userID", userID)
     if transaction_doc:
         return transaction_doc
     else:
         raise HTTPException(status_code=404, detail="Transaction document not found for user")
 
+@app.get("/executions/stats")
+async def get_execution_stats():
+    """Queue depth, in-flight count and wait times of the graph executors"""
+    return {"customer": graph_executor.stats(), "sop": sop_executor.stats(), "answer_cache": answer_cache.stats(), "embeddings": embedding_model.stats(), "router": local_router.stats(), "coalescing": start_execution_flight.stats(), "llm": llm_gateway.stats(), "issues_response_cache": issues_response_cache.stats()}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Per-node, LLM and tool metrics in Prometheus text format"""
+    record_executor_stats({"customer": graph_executor.stats(), "sop": sop_executor.stats()})
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # @app.get("/executions/pending")
 # async def get_pending_execution_endpoint():
 #     """Get all pending tool executions"""
@@ -259,7 +477,7 @@ async def approve_execution_endpoint(request: ApprovalRequest):
 
     thread = {"configurable": {"thread_id": request.threadID}}
 
-    response = sopGraph.invoke(None, thread, stream_mode="values")
+    response = await sop_executor.arun(sopGraph.ainvoke, None, thread, stream_mode="values")
 
     print(f"response: >>>>>>  {response}")
 